@@ -0,0 +1,16 @@
+"""
+tptb: Tim's Python Toolbox
+
+Subpackages and their contents are imported on first use, e.g. `import tptb` is
+instant and `from tptb.data import data_recorder` does not load pandas or matplotlib.
+- data: acquire and process data
+- io: read/write files
+- mpl: utils for matplotlib
+- straw: utils for strawberry fields
+"""
+
+from tptb._lazy import lazy_attributes
+
+__getattr__, __dir__ = lazy_attributes(
+    __name__, {"data": [], "io": [], "mpl": [], "straw": []}
+)
@@ -0,0 +1,37 @@
+# <<< Lazy loading for the package __init__ files (PEP 562): a submodule, and the heavy
+# dependencies it imports, are only loaded when one of its names is first used. >>>
+import importlib
+import sys
+from typing import Callable, Dict, List, Tuple
+
+
+def lazy_attributes(
+    package: str, attrs: Dict[str, List[str]]
+) -> Tuple[Callable, Callable]:
+    """
+    Module-level __getattr__ and __dir__ for a package
+    - package: __name__ of the package
+    - attrs: {submodule: [public names]}, every submodule is also reachable by its name
+        (a name equal to a submodule name refers to the submodule)
+    usage (in __init__.py):
+        __getattr__, __dir__ = lazy_attributes(__name__, {"aquire": ["data_recorder"]})
+    """
+    where = {sub: sub for sub in attrs}
+    for sub, names in attrs.items():
+        for name in names:
+            where.setdefault(name, sub)
+
+    def __getattr__(name: str):
+        if name not in where:
+            raise AttributeError(
+                "module {!r} has no attribute {!r}".format(package, name)
+            )
+        module = importlib.import_module(package + "." + where[name])
+        value = module if name in attrs else getattr(module, name)
+        setattr(sys.modules[package], name, value)  # next access skips __getattr__
+        return value
+
+    def __dir__() -> List[str]:
+        return sorted(set(vars(sys.modules[package])) | set(where))
+
+    return __getattr__, __dir__
@@ -0,0 +1 @@
+"""benchmarks, run as scripts: python -m tptb.benchmarks.<name>"""
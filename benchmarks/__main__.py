@@ -0,0 +1,71 @@
+# <<< Offline benchmark suite of tptb.
+# usage:
+#     python -m tptb.benchmarks run [-k pattern] [-o results.json] [--quick]
+#     python -m tptb.benchmarks compare baseline.json results.json [--time-tol 0.25]
+# compare exits with status 1 when a case regressed in time or peak memory. >>>
+import argparse
+import sys
+from tptb.benchmarks.harness import (
+    BENCHMARKS,
+    compare_results,
+    load_results,
+    run_benchmarks,
+    save_results,
+)
+import tptb.benchmarks.bench_straw  # noqa: F401, registers the cases
+import tptb.benchmarks.bench_io  # noqa: F401
+import tptb.benchmarks.bench_data  # noqa: F401
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m tptb.benchmarks")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_run = sub.add_parser("run", help="run the benchmarks")
+    p_run.add_argument("-k", default="", help="only cases whose name contains this")
+    p_run.add_argument("-o", "--output", help="save the results as json")
+    p_run.add_argument("--quick", action="store_true", help="fewer, shorter rounds")
+    sub.add_parser("list", help="list the benchmark cases")
+    p_cmp = sub.add_parser("compare", help="compare results with a baseline")
+    p_cmp.add_argument("baseline")
+    p_cmp.add_argument("current")
+    p_cmp.add_argument("--time-tol", type=float, default=0.25)
+    p_cmp.add_argument("--mem-tol", type=float, default=0.25)
+    args = parser.parse_args(argv)
+    #
+    if args.command == "list":
+        print("\n".join(BENCHMARKS))
+        return 0
+    if args.command == "run":
+        repeat, min_time = (3, 0.01) if args.quick else (5, 0.05)
+        results = run_benchmarks(args.k, repeat=repeat, min_time=min_time)
+        if args.output:
+            save_results(results, args.output)
+        return 0
+    rows = compare_results(
+        load_results(args.baseline),
+        load_results(args.current),
+        time_tol=args.time_tol,
+        mem_tol=args.mem_tol,
+    )
+    print("{:<80s}{:>10s}{:>10s}".format("case", "time", "memory"))
+    for row in rows:
+        flag = " ".join(
+            name
+            for name, bad in (
+                ("SLOWER", row["time_regression"]),
+                ("MEMORY", row["mem_regression"]),
+            )
+            if bad
+        )
+        print(
+            "{:<80s}{:>9.2f}x{:>9.2f}x  {:s}".format(
+                row["case"], row["time_ratio"], row["mem_ratio"], flag
+            )
+        )
+    n_bad = sum(row["time_regression"] or row["mem_regression"] for row in rows)
+    print("{:d} of {:d} cases regressed".format(n_bad, len(rows)))
+    return 1 if n_bad > 0 else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
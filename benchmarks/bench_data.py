@@ -0,0 +1,67 @@
+# <<< Benchmarks of tptb.data: smoothing and the data_recorder loop with simulated instruments. >>>
+import contextlib
+import io
+import time
+import numpy as np
+from tptb.benchmarks.harness import benchmark, fresh_file
+
+
+@benchmark(
+    "data.smooth_1d_data",
+    params=[dict(n=n, window_size=w) for n in (10**4, 10**6) for w in (5, 101)],
+)
+def _(n, window_size):
+    from tptb.data.process import smooth_1d_data
+
+    data = np.random.default_rng(0).normal(size=n)
+    return lambda: smooth_1d_data(data, window_size)
+
+
+def _instrument(latency: float, seed: int = 0):
+    """simulated instrument: returns a noisy reading after `latency` seconds"""
+    rng = np.random.default_rng(seed)
+
+    def read():
+        if latency > 0:
+            time.sleep(latency)
+        return rng.normal()
+
+    return read
+
+
+@benchmark(
+    "data.data_recorder",
+    params=[
+        dict(n_points=200, n_instruments=1, latency=0.0, concurrent=None),
+        dict(n_points=200, n_instruments=3, latency=0.0, concurrent=None),
+        dict(n_points=50, n_instruments=3, latency=0.002, concurrent=None),
+        dict(n_points=50, n_instruments=3, latency=0.002, concurrent="thread"),
+        dict(n_points=200, n_instruments=3, latency=0.0, verbose=True),
+        dict(n_points=200, n_instruments=3, latency=0.0, verbose=True, interval=0.01),
+    ],
+)
+def _(n_points, n_instruments, latency, concurrent=None, verbose=False, interval=0.0):
+    from tptb.data.aquire import data_recorder
+
+    y_func = [_instrument(latency, seed) for seed in range(n_instruments)]
+    yname = ["y{:d}".format(i) for i in range(n_instruments)]
+
+    def run():
+        # tqdm progress bar and verbose printing, the printing itself is still timed
+        with contextlib.redirect_stderr(io.StringIO()), contextlib.redirect_stdout(
+            io.StringIO()
+        ):
+            data_recorder(
+                fresh_file("recorder.csv"),
+                "x",
+                yname,
+                np.arange(n_points),
+                lambda x: None,
+                y_func,
+                wait=None,
+                concurrent=concurrent,
+                verbose=verbose,
+                print_interval=interval,
+            )
+
+    return run
@@ -0,0 +1,58 @@
+# <<< Benchmarks of tptb.io: csv append / load throughput and grouped statistics. >>>
+import numpy as np
+from tptb.benchmarks.harness import benchmark, fresh_file
+
+
+def _write_csv(fileName: str, n_rows: int, n_unique: int):
+    from tptb.io.csvf import CsvWriter
+
+    rng = np.random.default_rng(0)
+    x = rng.integers(0, n_unique, n_rows) * 0.1
+    y = rng.normal(size=(n_rows, 2))
+    with CsvWriter(fileName) as writer:
+        writer.write_row(["x", "y0", "y1"])
+        writer.write_block(np.column_stack((x, y)))
+
+
+@benchmark("io.csv_append_line", params=[dict(n_rows=200)])
+def _(n_rows):
+    from tptb.io.csvf import csv_append_line
+
+    def run():
+        fileName = fresh_file("append_line.csv")
+        for i in range(n_rows):
+            csv_append_line(fileName, [i, 0.5, 1.5])
+
+    return run
+
+
+@benchmark("io.CsvWriter.write_data", params=[dict(n_rows=10000)])
+def _(n_rows):
+    from tptb.io.csvf import CsvWriter
+
+    def run():
+        with CsvWriter(fresh_file("writer.csv")) as writer:
+            for i in range(n_rows):
+                writer.write_data(i, [0.5, 1.5])
+
+    return run
+
+
+@benchmark("io.load_csv", params=[dict(n_rows=100000)])
+def _(n_rows):
+    from tptb.io.csvf import _simple_load_csv_data
+
+    _write_csv("load.csv", n_rows, 100)
+    return lambda: _simple_load_csv_data("load.csv", "x", ["y0", "y1"])
+
+
+@benchmark(
+    "io.load_csv_data_with_stat",
+    params=[dict(n_unique=n) for n in (10, 1000, 100000)],
+)
+def _(n_unique):
+    from tptb.io.csvf import load_csv_data_with_stat
+
+    fileName = "stat_{:d}.csv".format(n_unique)
+    _write_csv(fileName, 200000, n_unique)
+    return lambda: load_csv_data_with_stat(fileName, "x", "y0")
@@ -0,0 +1,84 @@
+# <<< Benchmarks of tptb.straw: postselection, layout conversion, state construction. >>>
+import numpy as np
+from tptb.benchmarks.harness import benchmark
+
+SIZES_DM = [
+    dict(cutoff_dim=3, n_modes=4),
+    dict(cutoff_dim=5, n_modes=4),
+    dict(cutoff_dim=3, n_modes=6),
+    dict(cutoff_dim=4, n_modes=5),
+]
+SIZES_KET = SIZES_DM + [dict(cutoff_dim=4, n_modes=6), dict(cutoff_dim=5, n_modes=8)]
+
+
+def _random_dm(cutoff_dim: int, n_modes: int) -> np.ndarray:
+    D = cutoff_dim**n_modes
+    rng = np.random.default_rng(0)
+    return rng.normal(size=(D, D)) + 1j * rng.normal(size=(D, D))
+
+
+@benchmark("straw.postselect_dm", params=SIZES_DM)
+def _(cutoff_dim, n_modes):
+    from tptb.straw.postselect import postselect_dm
+    from tptb.straw.postselect_rule import total
+
+    state = _random_dm(cutoff_dim, n_modes)
+    rule = total == 2  # drops most basis states
+    # in place and idempotent, so the same array can be reused
+    return lambda: postselect_dm(state, rule, cutoff_dim, n_modes)
+
+
+@benchmark("straw.postselect_dm_compact", params=SIZES_DM)
+def _(cutoff_dim, n_modes):
+    from tptb.straw.postselect import postselect_dm_compact
+    from tptb.straw.postselect_rule import total
+
+    state = _random_dm(cutoff_dim, n_modes)
+    rule = total == 2  # drops most basis states
+    return lambda: postselect_dm_compact(state, rule, cutoff_dim, n_modes)
+
+
+@benchmark("straw.postselect_ket", params=SIZES_KET)
+def _(cutoff_dim, n_modes):
+    from tptb.straw.postselect import postselect_ket
+    from tptb.straw.postselect_rule import total
+
+    state = np.random.default_rng(0).normal(size=cutoff_dim**n_modes)
+    rule = total == 2  # drops most basis states
+    return lambda: postselect_ket(state, rule, cutoff_dim, n_modes)
+
+
+@benchmark("straw.straw2qt", params=[dict(cutoff_dim=d) for d in (3, 4, 5)])
+def _(cutoff_dim):
+    from tptb.straw.straw2qt import straw2qt
+
+    state = np.random.default_rng(0).normal(size=(cutoff_dim,) * 8)
+    return lambda: straw2qt(state, cutoff_dim, N=4)
+
+
+@benchmark("straw.qt2straw", params=[dict(cutoff_dim=d) for d in (3, 4, 5)])
+def _(cutoff_dim):
+    from tptb.straw.straw2qt import qt2straw
+
+    state = _random_dm(cutoff_dim, 4).real
+    return lambda: qt2straw(state, cutoff_dim, N=4)
+
+
+@benchmark(
+    "straw.state_from_str",
+    params=[
+        dict(cutoff_dim=3, sparse=False),
+        dict(cutoff_dim=5, sparse=False),
+        dict(cutoff_dim=5, sparse=True),
+    ],
+)
+def _(cutoff_dim, sparse):
+    from tptb.straw import state_from_str as sfs
+
+    def run():
+        # cold caches, so the parsing is measured too
+        sfs._parse_state_str.cache_clear()
+        sfs._sparse_state_from_str.cache_clear()
+        return sfs.qubit_state_from_str("0110+1001-1010", cutoff_dim, sparse=sparse)
+
+    return run
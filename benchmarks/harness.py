@@ -0,0 +1,178 @@
+# <<< Minimal offline benchmark harness: a registry of cases, timing + peak memory per case,
+# json baselines and a comparison that flags regressions. >>>
+import itertools
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+import numpy as np
+from typing import Callable, Dict, List, Union
+
+BENCHMARKS: Dict[str, Callable] = {}
+_file_counter = itertools.count()
+
+
+def benchmark(name: str, params: Union[List[dict], None] = None) -> Callable:
+    """
+    Register a benchmark case, once per entry of params
+    - the decorated function gets the params as keyword arguments, does the setup
+        and returns the callable to time (called without arguments)
+    - cases run in a temporary working directory, so files may use relative names
+    usage:
+        @benchmark("straw.straw2qt", params=[dict(cutoff_dim=3), dict(cutoff_dim=5)])
+        def _(cutoff_dim):
+            state = ...
+            return lambda: straw2qt(state, cutoff_dim)
+    """
+
+    def _register(setup: Callable) -> Callable:
+        for kwargs in params if params is not None else [{}]:
+            label = ",".join("{}={}".format(k, v) for k, v in kwargs.items())
+            case = "{}[{}]".format(name, label) if label else name
+
+            def _make(setup=setup, kwargs=kwargs):
+                return setup(**kwargs)
+
+            BENCHMARKS[case] = _make
+        return setup
+
+    return _register
+
+
+def fresh_file(fileName: str) -> str:
+    """
+    A file name not used before in this run, e.g. "data.csv" -> "data_12.csv"
+    - for cases that append to a file, so that every call starts from an empty file
+    """
+    root, ext = os.path.splitext(fileName)
+    return "{:s}_{:d}{:s}".format(root, next(_file_counter), ext)
+
+
+def measure(func: Callable, repeat: int = 5, min_time: float = 0.05) -> dict:
+    """
+    - seconds: median time of one call over `repeat` rounds, each round calls func
+        as often as needed to take at least min_time (like timeit.autorange)
+    - peak_bytes: peak memory allocated during one call (tracemalloc, numpy included)
+    """
+    number = 1
+    while True:
+        t0 = time.perf_counter()
+        for _ in range(number):
+            func()
+        elapsed = time.perf_counter() - t0
+        if elapsed >= min_time or number >= 1 << 20:
+            break
+        number *= 10 if elapsed < min_time / 10 else 2
+    times = [elapsed / number]
+    for _ in range(repeat - 1):
+        t0 = time.perf_counter()
+        for _ in range(number):
+            func()
+        times.append((time.perf_counter() - t0) / number)
+    #
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return dict(
+        seconds=float(np.median(times)),
+        seconds_min=float(np.min(times)),
+        number=number,
+        repeat=repeat,
+        peak_bytes=int(peak),
+    )
+
+
+def run_benchmarks(
+    pattern: str = "",
+    repeat: int = 5,
+    min_time: float = 0.05,
+    verbose: bool = True,
+) -> dict:
+    """
+    Run all registered cases whose name contains pattern
+    - Return: {"meta": {...}, "results": {case: measure(...)}}
+    """
+    results = {}
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmpdir:
+        try:
+            for case, make in BENCHMARKS.items():
+                if pattern not in case:
+                    continue
+                os.chdir(tmpdir)
+                results[case] = measure(make(), repeat=repeat, min_time=min_time)
+                if verbose:
+                    print(format_result(case, results[case]), flush=True)
+        finally:
+            os.chdir(cwd)
+    meta = dict(
+        time=time.strftime("%Y-%m-%d %H:%M:%S"),
+        python=sys.version.split()[0],
+        numpy=np.__version__,
+        platform=platform.platform(),
+        machine=platform.machine(),
+    )
+    return dict(meta=meta, results=results)
+
+
+def format_result(case: str, res: dict) -> str:
+    return "{:<80s}{:>12.4f} ms{:>12.2f} MiB".format(
+        case, res["seconds"] * 1e3, res["peak_bytes"] / 2**20
+    )
+
+
+def save_results(results: dict, fileName: str):
+    tmpName = fileName + ".tmp"
+    with open(tmpName, "w") as f:
+        json.dump(results, f, indent=1, sort_keys=True)
+    os.replace(tmpName, fileName)
+
+
+def load_results(fileName: str) -> dict:
+    with open(fileName) as f:
+        return json.load(f)
+
+
+def compare_results(
+    baseline: dict,
+    current: dict,
+    time_tol: float = 0.25,
+    mem_tol: float = 0.25,
+    min_seconds: float = 1e-5,
+    min_bytes: int = 2**20,
+) -> List[dict]:
+    """
+    Cases present in both runs, each with the ratios current / baseline
+    - a case regresses when it is slower by more than time_tol (and by at least
+        min_seconds) or needs more peak memory by more than mem_tol (and by at least
+        min_bytes), the absolute floors keep timer noise of tiny cases out
+    - Return: [{"case", "time_ratio", "mem_ratio", "time_regression", "mem_regression"}]
+    """
+    rows = []
+    base, cur = baseline["results"], current["results"]
+    for case in sorted(set(base) & set(cur)):
+        b, c = base[case], cur[case]
+        time_ratio = c["seconds"] / b["seconds"] if b["seconds"] > 0 else np.inf
+        mem_ratio = c["peak_bytes"] / b["peak_bytes"] if b["peak_bytes"] > 0 else 1.0
+        rows.append(
+            dict(
+                case=case,
+                time_ratio=time_ratio,
+                mem_ratio=mem_ratio,
+                time_regression=bool(
+                    time_ratio > 1 + time_tol
+                    and c["seconds"] - b["seconds"] > min_seconds
+                ),
+                mem_regression=bool(
+                    mem_ratio > 1 + mem_tol
+                    and c["peak_bytes"] - b["peak_bytes"] > min_bytes
+                ),
+            )
+        )
+    return rows
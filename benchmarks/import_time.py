@@ -0,0 +1,80 @@
+# <<< Import time of tptb modules, each measured in a fresh interpreter. >>>
+# usage: python -m tptb.benchmarks.import_time [-n 5] [--json] [module ...]
+import argparse
+import json
+import subprocess
+import sys
+import numpy as np
+from typing import Dict, List
+
+MODULES = [
+    "tptb",
+    "tptb.data",
+    "tptb.data.aquire",
+    "tptb.data.sweep",
+    "tptb.data.process",
+    "tptb.io.csvf",
+    "tptb.io.npyf",
+    "tptb.io.streamstat",
+    "tptb.straw.postselect_func",
+    "tptb.straw.straw2qt",
+    "tptb.mpl.interactive",
+]
+# heavy third-party modules worth keeping out of an import, stdlib ones are cheap
+HEAVY = ["numpy", "pandas", "scipy", "matplotlib", "tqdm"]
+
+_SCRIPT = """
+import sys, time, json
+heavy = {heavy!r}
+t0 = time.perf_counter()
+import numpy
+t1 = time.perf_counter()
+import {module}
+t2 = time.perf_counter()
+print(json.dumps([t1 - t0, t2 - t1, [m for m in heavy if m in sys.modules]]))
+"""
+
+
+def import_time(module: str, n: int = 5) -> Dict:
+    """
+    Median over n fresh interpreters of the time to import module, numpy is imported
+    first and reported separately (every module needs it)
+    - Return: {"module", "seconds", "numpy_seconds", "loaded": heavy modules loaded}
+    """
+    script = _SCRIPT.format(module=module, heavy=HEAVY)
+    runs = []
+    for _ in range(n):
+        out = subprocess.run(
+            [sys.executable, "-c", script], capture_output=True, text=True, check=True
+        )
+        runs.append(json.loads(out.stdout.strip().splitlines()[-1]))
+    return dict(
+        module=module,
+        seconds=float(np.median([run[1] for run in runs])),
+        numpy_seconds=float(np.median([run[0] for run in runs])),
+        loaded=runs[-1][2],
+    )
+
+
+def main(argv: List[str] = None):
+    parser = argparse.ArgumentParser(description="import time of tptb modules")
+    parser.add_argument("modules", nargs="*", default=MODULES)
+    parser.add_argument("-n", type=int, default=5, help="interpreters per module")
+    parser.add_argument("--json", action="store_true", help="machine-readable output")
+    args = parser.parse_args(argv)
+    results = [import_time(module, args.n) for module in args.modules]
+    if args.json:
+        print(json.dumps(results, indent=1))
+        return results
+    print("{:<32s}{:>12s}  {:s}".format("module", "import(ms)", "loaded"))
+    for res in results:
+        print(
+            "{:<32s}{:>12.1f}  {:s}".format(
+                res["module"], res["seconds"] * 1e3, ", ".join(res["loaded"])
+            )
+        )
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+"""acquire and process data, submodules are imported on first use"""
+
+from tptb._lazy import lazy_attributes
+
+__getattr__, __dir__ = lazy_attributes(
+    __name__,
+    {
+        "aquire": ["data_recorder"],
+        "grid": ["snake_order", "raster_order"],
+        "process": ["smooth_1d_data"],
+        "search": [
+            "BudgetExhausted",
+            "MeasurementCache",
+            "SEARCH_STRATEGIES",
+            "grid_search",
+            "coarse_to_fine",
+            "gp_search",
+            "scipy_minimize",
+            "run_search",
+        ],
+        "smooth": [
+            "SMOOTH_METHODS",
+            "boxcar",
+            "median",
+            "savgol",
+            "exponential",
+            "StreamingSmoother",
+        ],
+        "sweep": [
+            "step_wait",
+            "stable_wait",
+            "sweep_recorder",
+        ],
+        "timing": ["PhaseTimer"],
+    },
+)
@@ -1,54 +1,265 @@
+import asyncio
+import inspect
+import os
 import numpy as np
+import queue
+import threading
 import time
-from tptb.io.csvf import csv_append_data
+from concurrent.futures import ThreadPoolExecutor
+from tptb.io.csvf import CsvWriter, ShardedCsvWriter
+from tptb.io.npyf import NpyWriter
+from tptb.data.timing import PhaseTimer, NO_TIMER
 from typing import Union, List, Callable
 
 
+def _open_writer(
+    fileName: str, columns: List[str], fmt: str, flush_interval: float
+) -> Union[CsvWriter, NpyWriter]:
+    if fmt == "csv":
+        new_file = not os.path.exists(fileName) or os.path.getsize(fileName) == 0
+        writer = CsvWriter(fileName, flush_interval=flush_interval)
+        if new_file:
+            writer.write_row(columns)  # csv header, once per file
+            writer.flush()
+        return writer
+    elif fmt == "npy":
+        return NpyWriter(fileName, columns, flush_interval=flush_interval)
+    elif fmt == "sharded":
+        return ShardedCsvWriter(fileName, columns, flush_interval=flush_interval)
+    else:
+        raise ValueError("fmt must be csv, npy or sharded")
+
+
+class _BackgroundWriter:
+    """
+    Hand rows to `writer` on a separate thread, so disk I/O never blocks the measurement
+    - writer: CsvWriter / NpyWriter, closed together with this object
+    """
+
+    def __init__(self, writer: Union[CsvWriter, NpyWriter], maxsize: int = 0):
+        self.writer = writer
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._error = None
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    return
+                method, args = item
+                getattr(self.writer, method)(*args)
+            except Exception as e:
+                self._error = e
+            finally:
+                self._queue.task_done()
+
+    def _put(self, method: str, *args):
+        if self._error is not None:
+            raise self._error
+        self._queue.put((method, args))
+
+    def write_data(self, x, y):
+        self._put("write_data", x, y)
+
+    def write_row(self, data):
+        self._put("write_row", data)
+
+    def flush(self, block: bool = True):
+        """
+        - block: wait until the writer thread has flushed, else only queue the flush
+            behind the rows already handed over
+        """
+        self._put("flush")
+        if block:
+            self._queue.join()
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join()
+        # the writer is closed in any case; an error from the thread is raised
+        # first, so a failing writer.close() shows up chained to it, not instead
+        try:
+            if self._error is not None:
+                raise self._error
+        finally:
+            self.writer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class _Printer:
+    """print at most once per `interval` seconds, interval=0 prints everything"""
+
+    def __init__(self, verbose: bool = True, interval: float = 0.0):
+        self.verbose = verbose
+        self.interval = interval
+        self._last = -np.inf
+        self.show = verbose
+
+    def tick(self) -> bool:
+        """decide whether the messages of this step are shown"""
+        now = time.monotonic()
+        self.show = self.verbose and now - self._last >= self.interval
+        if self.show:
+            self._last = now
+        return self.show
+
+    def __call__(self, msg: str):
+        if self.show:
+            print(msg)
+
+
+async def _gather_async(y_func: List[Callable]) -> list:
+    loop = asyncio.get_running_loop()
+    calls = [
+        f() if inspect.iscoroutinefunction(f) else loop.run_in_executor(None, f)
+        for f in y_func
+    ]
+    return await asyncio.gather(*calls)
+
+
 def data_recorder(
     fileName: str,
-    xname: str,
+    xname: Union[List[str], str],
     yname: Union[List[str], str],
     x_list: np.ndarray,
     x_func: Callable,
     y_func: Union[List[Callable], Callable],
     idx_start: int = 0,
-    wait: Union[None, float] = 2.0,
+    wait: Union[None, float, Callable] = 2.0,
     measure_num=1,
+    flush_interval: float = 1.0,
+    fmt: str = "csv",
+    concurrent: Union[None, str] = None,
+    background_write: bool = False,
+    verbose: bool = True,
+    print_interval: float = 0.0,
+    timer: Union[PhaseTimer, None] = None,
 ) -> None:
     """
-    - fileName: file name to save data
-    - wait: None: no wait, 0: manual input, else: wait time in seconds
+    - fileName: file name to save data (a directory for fmt="npy" and "sharded")
+    - xname: a list of names for several axes, then x_list is (P, n_axes)
+        and x_func gets one row of it, see tptb.data.sweep
+    - wait: None: no wait, 0: manual input, callable: wait(prev_x, x) does the waiting,
+        else: wait time in seconds
+    - flush_interval: rows are buffered and written to disk at least this often (seconds)
+        while measuring, and all buffered rows are flushed at the end of every x
+        (without waiting for the disk when background_write)
+    - fmt: "csv": csv file, "npy": chunked binary dataset, see tptb.io.npyf,
+        "sharded": one csv shard per process, for several recorders sharing a
+        directory, see tptb.io.csvf.ShardedCsvWriter
+    - concurrent: how the (independent) y_func are called for each row
+        None: one after another
+        "thread": all at once in a thread pool
+        "async": all at once on an asyncio loop, y_func may be async functions
+    - background_write: write rows from a background thread fed by a queue
+    - verbose: print x and y values
+    - print_interval: print at most once per print_interval seconds, 0: every row
+    - timer: PhaseTimer recording the time spent in x_func, wait, each y_func
+        (or "y_func" as a whole when concurrent), write, sleep and print per x;
+        print(timer.summary()) afterwards; an iteration left open by an exception
+        is aborted (profiler disabled), but the timer and its log_file stay open
+        for the caller to close, e.g. `with PhaseTimer(...) as timer:`
     """
     # assertion
+    multi_x = not isinstance(xname, str)
+    xnames = list(xname) if multi_x else [xname]
     if isinstance(yname, str):
         yname = [yname]
     if isinstance(y_func, Callable):
         y_func = [y_func]
     assert len(yname) == len(y_func), "yname and y_func should have same length"
+    assert concurrent in (None, "thread", "async"), "concurrent: None/thread/async"
     #
-    # csv header
-    csv_append_data(fileName, xname, yname)  # type: ignore
     # using tqdm
     from tqdm import tqdm
 
-    for idx, x in enumerate(tqdm(x_list[idx_start:])):
-        print("{:s}: \t{:.4f}".format(xname, x))
-        x_func(x)
-        # wait
-        if wait is not None:  # if is none, just don't wait
-            if wait == 0:  # manual input
-                a = input()
-            else:
-                time.sleep(wait)
-        # measure
-        print("Begin Measuring")
-        for j in range(measure_num):
-            y = []
-            for yname_i, y_func_i in zip(yname, y_func):
-                y_i = float(y_func_i())
-                print("{:s}: \t{:.8f}".format(yname_i, y_i))
-                y.append(y_i)
-            #
-            csv_append_data(fileName, x, y)
-            time.sleep(0.001)
-        print("Finished Measuring")
+    printer = _Printer(verbose, print_interval)
+    if timer is None:
+        timer = NO_TIMER
+    executor = ThreadPoolExecutor(len(y_func)) if concurrent == "thread" else None
+    loop = None
+    if concurrent == "async":
+        loop = asyncio.new_event_loop()
+
+    def _measure() -> list:
+        if concurrent == "thread":
+            futures = [executor.submit(y_func_i) for y_func_i in y_func]
+            y = [future.result() for future in futures]
+            timer.mark("y_func")
+            return y
+        elif concurrent == "async":
+            y = loop.run_until_complete(_gather_async(y_func))
+            timer.mark("y_func")
+            return y
+        y = []
+        for yname_i, y_func_i in zip(yname, y_func):
+            y.append(y_func_i())
+            timer.mark("y_func:" + yname_i)
+        return y
+
+    writer = _open_writer(fileName, [*xnames, *yname], fmt, flush_interval)
+    if background_write:
+        writer = _BackgroundWriter(writer)
+    # the short sleep after each row is only kept for the default serial mode
+    row_sleep = 0.001 if concurrent is None and not background_write else 0
+    try:
+        with writer:
+            prev_x = None
+            for idx, x in enumerate(tqdm(x_list[idx_start:])):
+                timer.start()
+                x_row = [float(x_i) for x_i in x] if multi_x else [x]
+                printer.tick()
+                for xname_i, x_i in zip(xnames, x_row):
+                    printer("{:s}: \t{:.4f}".format(xname_i, x_i))
+                timer.mark("print")
+                x_func(x)
+                timer.mark("x_func")
+                # wait
+                if callable(wait):
+                    wait(prev_x, x)
+                elif wait is not None:  # if is none, just don't wait
+                    if wait == 0:  # manual input
+                        writer.flush()
+                        a = input()
+                    else:
+                        time.sleep(wait)
+                timer.mark("wait")
+                # measure
+                printer("Begin Measuring")
+                for j in range(measure_num):
+                    y = [float(y_i) for y_i in _measure()]
+                    for yname_i, y_i in zip(yname, y):
+                        printer("{:s}: \t{:.8f}".format(yname_i, y_i))
+                    timer.mark("print")
+                    #
+                    writer.write_row(x_row + y)
+                    timer.mark("write")
+                    if row_sleep:
+                        time.sleep(row_sleep)
+                        timer.mark("sleep")
+                printer("Finished Measuring")
+                timer.mark("print")
+                # rows of this x reach the disk before the next x_func / wait,
+                # which may take long and would otherwise keep them buffered;
+                # the background writer flushes on its thread, the loop goes on
+                if background_write:
+                    writer.flush(block=False)
+                else:
+                    writer.flush()
+                timer.mark("write")
+                timer.stop()
+                prev_x = x
+    finally:
+        timer.abort()
+        if executor is not None:
+            executor.shutdown()
+        if loop is not None:
+            loop.close()
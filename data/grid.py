@@ -0,0 +1,30 @@
+# <<< Orderings of grid points, shared by sweeps and searches, depends on numpy only. >>>
+import numpy as np
+from typing import Sequence
+
+
+def snake_order(axes: Sequence[np.ndarray]) -> np.ndarray:
+    """
+    All grid points, ordered so that consecutive points differ by one step on one axis
+    - axes: values of each axis, the last axis moves fastest
+    - Return: (P, n_axes)
+    e.g. axes = ([0, 1], [0, 1, 2]):
+        (0, 0), (0, 1), (0, 2), (1, 2), (1, 1), (1, 0)
+    """
+    axes = [np.asarray(axis, dtype=float) for axis in axes]
+    if len(axes) == 1:
+        return axes[0][:, None]
+    inner = snake_order(axes[1:])
+    blocks = []
+    for i, value in enumerate(axes[0]):
+        block = inner if i % 2 == 0 else inner[::-1]
+        blocks.append(np.column_stack((np.full(len(block), value), block)))
+    return np.concatenate(blocks)
+
+
+def raster_order(axes: Sequence[np.ndarray]) -> np.ndarray:
+    """All grid points in plain nested-loop order, the last axis moves fastest"""
+    grids = np.meshgrid(
+        *[np.asarray(axis, dtype=float) for axis in axes], indexing="ij"
+    )
+    return np.column_stack([grid.reshape(-1) for grid in grids])
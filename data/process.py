@@ -1,4 +1,5 @@
 import numpy as np
+from tptb.data.smooth import boxcar
 
 
 def smooth_1d_data(data: np.ndarray, window_size: int = 3) -> np.ndarray:
@@ -6,13 +7,9 @@ def smooth_1d_data(data: np.ndarray, window_size: int = 3) -> np.ndarray:
     Smooth 1D data using a window size.
     - data: 1D data
     - window_size: size of the window
+    - see tptb.data.smooth for N-D data and other filters
     """
-    kernel = np.ones(window_size) / window_size
-    y_smooth = np.convolve(data, kernel, mode="same")
-    #
-    for i in range(window_size // 2):
-        y_smooth[i] = data[i]  # fix the first i elements
-    for i in range(-window_size // 2, 0):
-        y_smooth[i] = data[i]  # fix the last i elements
-    #
+    y_smooth = boxcar(data, window_size, edge="keep")
+    # as before, the last window_size // 2 + window_size % 2 elements are not smoothed
+    y_smooth[-window_size // 2 :] = data[-window_size // 2 :]
     return y_smooth
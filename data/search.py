@@ -0,0 +1,226 @@
+# <<< Search strategies for expensive measurements (e.g. aligning a beam to maximize transmission). >>>
+# <<< Every strategy maximizes objective(paras) inside bounds; wrap the measurement in
+# MeasurementCache so repeated points are free and a step / time budget stops the search. >>>
+import time
+import numpy as np
+from typing import Callable, Dict, Sequence, Tuple, Union
+from tptb.data.grid import snake_order
+
+
+class BudgetExhausted(Exception):
+    pass
+
+
+class MeasurementCache:
+    """
+    Objective wrapper around an expensive measurement
+    - measure_func: measure_func(paras) -> result, e.g. moves hardware and measures
+    - value: value(result) -> float to maximize, default: float(result)
+    - tol: points that round to the same multiple of tol are measured once
+    - max_steps, max_time (seconds): budget of new measurements, BudgetExhausted is
+        raised when it is used up, cached points are always returned
+    - on_measure: on_measure(paras, result) after every new measurement, e.g. a plot update
+    """
+
+    def __init__(
+        self,
+        measure_func: Callable,
+        value: Union[Callable, None] = None,
+        tol: float = 1e-3,
+        max_steps: Union[int, None] = None,
+        max_time: Union[float, None] = None,
+        on_measure: Union[Callable, None] = None,
+    ):
+        self.measure_func = measure_func
+        self.value = value if value is not None else float
+        self.tol = tol
+        self.max_steps = max_steps
+        self.max_time = max_time
+        self.on_measure = on_measure
+        self.cache: Dict[tuple, Tuple[np.ndarray, float]] = {}
+        self.history = []  # [(paras, result), ...] of new measurements
+        self.hits = 0
+        self._t0 = None
+
+    def _key(self, paras: np.ndarray) -> tuple:
+        return tuple(np.round(paras / self.tol).astype(np.int64).tolist())
+
+    def exhausted(self) -> bool:
+        if self.max_steps is not None and len(self.history) >= self.max_steps:
+            return True
+        if self.max_time is not None and self._t0 is not None:
+            return time.monotonic() - self._t0 >= self.max_time
+        return False
+
+    def __call__(self, paras) -> float:
+        paras = np.asarray(paras, dtype=float)
+        key = self._key(paras)
+        if key in self.cache:
+            self.hits += 1
+            return self.cache[key][1]
+        if self._t0 is None:
+            self._t0 = time.monotonic()
+        if self.exhausted():
+            raise BudgetExhausted()
+        result = self.measure_func(paras)
+        value = self.value(result)
+        self.cache[key] = (paras, value)
+        self.history.append((paras, result))
+        if self.on_measure is not None:
+            self.on_measure(paras, result)
+        return value
+
+    def best(self) -> Union[Tuple[np.ndarray, float], None]:
+        """(paras, value) of the best point measured so far, None before the first one"""
+        if len(self.cache) == 0:
+            return None
+        return max(self.cache.values(), key=lambda item: item[1])
+
+
+def _bounds_array(bounds: Sequence[Tuple[float, float]]) -> np.ndarray:
+    bounds = np.asarray(bounds, dtype=float)
+    assert bounds.ndim == 2 and bounds.shape[1] == 2, "bounds: [(lo, hi), ...]"
+    return bounds
+
+
+def grid_search(
+    objective: Callable, bounds: Sequence[Tuple[float, float]], n: int = 11
+) -> None:
+    """n points per axis, measured in snake order"""
+    bounds = _bounds_array(bounds)
+    for paras in snake_order([np.linspace(lo, hi, n) for lo, hi in bounds]):
+        objective(paras)
+
+
+def coarse_to_fine(
+    objective: MeasurementCache,
+    bounds: Sequence[Tuple[float, float]],
+    n: int = 5,
+    levels: int = 3,
+    shrink: float = 0.4,
+) -> None:
+    """
+    Grid of n points per axis, then repeatedly a new grid of the same size on a box
+    shrink times smaller, centered on the best point so far
+    """
+    bounds = _bounds_array(bounds)
+    box = bounds.copy()
+    for _ in range(levels):
+        for paras in snake_order([np.linspace(lo, hi, n) for lo, hi in box]):
+            objective(paras)
+        center = objective.best()[0]
+        half = (box[:, 1] - box[:, 0]) * shrink / 2
+        box = np.column_stack((center - half, center + half))
+        # keep the box inside bounds without changing its size
+        box -= np.minimum(box[:, :1] - bounds[:, :1], 0)
+        box -= np.maximum(box[:, 1:] - bounds[:, 1:], 0)
+
+
+def _rbf(a: np.ndarray, b: np.ndarray, length_scale: np.ndarray) -> np.ndarray:
+    d = (a[:, None, :] - b[None, :, :]) / length_scale
+    return np.exp(-0.5 * np.sum(d**2, axis=-1))
+
+
+def gp_search(
+    objective: Callable,
+    bounds: Sequence[Tuple[float, float]],
+    n_init: int = 6,
+    n_iter: int = 30,
+    length_scale: float = 0.2,
+    noise: float = 1e-3,
+    n_candidates: int = 2000,
+    seed: Union[int, None] = None,
+) -> None:
+    """
+    Bayesian optimization with a Gaussian-process surrogate (RBF kernel) and
+    expected improvement, for smooth objectives with a single broad maximum
+    - n_init: random points before the surrogate is used
+    - length_scale: kernel length, as a fraction of the range of each axis
+    - noise: measurement noise, as a fraction of the spread of the values
+    """
+    from scipy.stats import norm
+
+    bounds = _bounds_array(bounds)
+    lo, span = bounds[:, 0], bounds[:, 1] - bounds[:, 0]
+    rng = np.random.default_rng(seed)
+    X = [lo + span * rng.random(len(bounds)) for _ in range(n_init)]
+    Y = [objective(x) for x in X]
+    for _ in range(n_iter):
+        x_train, y_train = np.asarray(X), np.asarray(Y)
+        y_mean, y_std = np.mean(y_train), np.std(y_train) or 1.0
+        y_norm = (y_train - y_mean) / y_std
+        ls = length_scale * span
+        K = _rbf(x_train, x_train, ls) + (noise + 1e-9) * np.eye(len(x_train))
+        L = np.linalg.cholesky(K)
+        alpha = np.linalg.solve(L.T, np.linalg.solve(L, y_norm))
+        # candidates: uniform in bounds, plus some near the best point
+        best = x_train[np.argmax(y_train)]
+        cand = lo + span * rng.random((n_candidates, len(bounds)))
+        local = best + ls * rng.normal(size=(n_candidates // 4, len(bounds)))
+        cand = np.concatenate((cand, np.clip(local, lo, lo + span)))
+        k = _rbf(cand, x_train, ls)
+        mu = k @ alpha
+        v = np.linalg.solve(L, k.T)
+        sigma = np.sqrt(np.maximum(1 - np.sum(v**2, axis=0), 1e-12))
+        z = (mu - np.max(y_norm)) / sigma
+        ei = (mu - np.max(y_norm)) * norm.cdf(z) + sigma * norm.pdf(z)
+        x_next = cand[np.argmax(ei)]
+        X.append(x_next)
+        Y.append(objective(x_next))
+
+
+def scipy_minimize(
+    objective: Callable,
+    bounds: Sequence[Tuple[float, float]],
+    x0: Union[Sequence[float], None] = None,
+    method: str = "Powell",
+    options: Union[dict, None] = None,
+) -> None:
+    """scipy.optimize.minimize on -objective, starting at x0 (default: center of bounds)"""
+    from scipy.optimize import minimize
+
+    bounds = _bounds_array(bounds)
+    if x0 is None:
+        x0 = bounds.mean(axis=1)
+    if options is None:
+        options = {"maxiter": 80, "ftol": 1e-10}
+    minimize(
+        lambda paras: -objective(paras),
+        x0=x0,
+        method=method,
+        bounds=bounds,
+        options=options,
+    )
+
+
+SEARCH_STRATEGIES = {
+    "grid": grid_search,
+    "coarse_to_fine": coarse_to_fine,
+    "gp": gp_search,
+    "powell": scipy_minimize,
+}
+
+
+def run_search(
+    strategy: Union[str, Callable],
+    objective: MeasurementCache,
+    bounds: Sequence[Tuple[float, float]],
+    **kwargs,
+) -> Union[Tuple[np.ndarray, float], None]:
+    """
+    Run a strategy until it finishes or the budget of objective is used up
+    - strategy: a name in SEARCH_STRATEGIES, or strategy(objective, bounds, **kwargs)
+    - Return: (paras, value) of the best measured point, None if the budget allowed
+        no measurement (e.g. max_steps=0)
+    """
+    if isinstance(strategy, str):
+        if strategy not in SEARCH_STRATEGIES:
+            raise ValueError(
+                "strategy must be one of {}".format(list(SEARCH_STRATEGIES))
+            )
+        strategy = SEARCH_STRATEGIES[strategy]
+    try:
+        strategy(objective, bounds, **kwargs)
+    except BudgetExhausted:
+        pass
+    return objective.best()
@@ -0,0 +1,221 @@
+# <<< Smoothing along any axis of N-D arrays, in one call for a whole stack of traces. >>>
+# <<< smooth() for arrays (also np.memmap, in chunks), StreamingSmoother for live data. >>>
+import numpy as np
+from functools import partial
+from typing import Union
+
+SMOOTH_METHODS = ("boxcar", "savgol", "median", "exponential")
+
+
+def _centered_valid(n: int, window_size: int) -> slice:
+    """indices whose window data[i - w//2 : i + (w-1)//2 + 1] lies inside the data"""
+    return slice(window_size // 2, n - (window_size - 1) // 2)
+
+
+def _fix_edges(
+    y_smooth: np.ndarray, data: np.ndarray, window_size: int, edge: str
+) -> np.ndarray:
+    """y_smooth, data: smoothing axis last"""
+    n = data.shape[-1]
+    valid = _centered_valid(n, window_size)
+    head = slice(0, valid.start)
+    tail = slice(max(valid.stop, valid.start), n)
+    if edge == "keep":
+        y_smooth[..., head] = data[..., head]
+        y_smooth[..., tail] = data[..., tail]
+    elif edge == "nan":
+        y_smooth[..., head] = np.nan
+        y_smooth[..., tail] = np.nan
+    elif edge != "shrink":
+        raise ValueError("edge must be keep, nan or shrink")
+    return y_smooth
+
+
+def boxcar(
+    data: np.ndarray, window_size: int = 3, axis: int = -1, edge: str = "keep"
+) -> np.ndarray:
+    """
+    Moving average in O(n) with a cumulative sum, aligned as np.convolve(mode="same")
+    - edge: where the window does not fit, "keep": original data,
+        "shrink": average of the available points, "nan": nan
+    """
+    data = np.moveaxis(np.asarray(data, dtype=float), axis, -1)
+    n = data.shape[-1]
+    csum = np.zeros(data.shape[:-1] + (n + 1,))
+    np.cumsum(data, axis=-1, out=csum[..., 1:])
+    i = np.arange(n)
+    start = np.clip(i - window_size // 2, 0, n)
+    stop = np.clip(i + (window_size - 1) // 2 + 1, 0, n)
+    y_smooth = (csum[..., stop] - csum[..., start]) / (stop - start)
+    y_smooth = _fix_edges(y_smooth, data, window_size, edge)
+    return np.moveaxis(y_smooth, -1, axis)
+
+
+def median(
+    data: np.ndarray, window_size: int = 3, axis: int = -1, edge: str = "keep"
+) -> np.ndarray:
+    """
+    Moving median, aligned as boxcar
+    - edge: "keep" / "nan" ("shrink" is not supported)
+    """
+    if edge == "shrink":
+        raise ValueError("median supports edge keep or nan")
+    data = np.moveaxis(np.asarray(data, dtype=float), axis, -1)
+    y_smooth = np.empty_like(data)
+    valid = _centered_valid(data.shape[-1], window_size)
+    if valid.stop > valid.start:
+        windows = np.lib.stride_tricks.sliding_window_view(data, window_size, axis=-1)
+        y_smooth[..., valid] = np.median(windows, axis=-1)
+    y_smooth = _fix_edges(y_smooth, data, window_size, edge)
+    return np.moveaxis(y_smooth, -1, axis)
+
+
+def savgol(
+    data: np.ndarray, window_size: int = 5, polyorder: int = 2, axis: int = -1
+) -> np.ndarray:
+    """Savitzky-Golay filter (scipy.signal.savgol_filter), polynomial fit at the edges"""
+    from scipy.signal import savgol_filter
+
+    return savgol_filter(
+        np.asarray(data, dtype=float), window_size, polyorder, axis=axis, mode="interp"
+    )
+
+
+def exponential(
+    data: np.ndarray, alpha: float = 0.5, axis: int = -1, initial=None
+) -> np.ndarray:
+    """
+    Exponential moving average, y[i] = alpha * x[i] + (1 - alpha) * y[i-1]
+    - initial: y[-1], default: y[0] = x[0]
+    """
+    from scipy.signal import lfilter
+
+    data = np.moveaxis(np.asarray(data, dtype=float), axis, -1)
+    if initial is None:
+        initial = data[..., :1]
+    zi = (1 - alpha) * np.broadcast_to(initial, data.shape[:-1] + (1,))
+    y_smooth, _ = lfilter([alpha], [1, alpha - 1], data, axis=-1, zi=zi)
+    return np.moveaxis(y_smooth, -1, axis)
+
+
+def smooth(
+    data: np.ndarray,
+    window_size: int = 3,
+    method: str = "boxcar",
+    axis: int = -1,
+    out: Union[np.ndarray, None] = None,
+    chunk_size: Union[int, None] = None,
+    **kwargs,
+) -> np.ndarray:
+    """
+    Smooth along `axis` of an N-D array, e.g. a (n_traces, n_points) stack at once
+    - method: "boxcar" / "savgol" / "median" / "exponential"
+    - kwargs: edge (boxcar, median), polyorder (savgol), alpha (exponential)
+    - out: output array (may be a np.memmap), default: new array
+    - chunk_size: smooth this many points along `axis` at a time, for memmapped data
+        that does not fit in memory; each chunk is read with window_size // 2 extra
+        points on both sides, which are trimmed after smoothing, so the result
+        equals the unchunked one (exponential carries its state across chunks)
+    """
+    funcs = {
+        "boxcar": boxcar,
+        "savgol": savgol,
+        "median": median,
+        "exponential": exponential,
+    }
+    if method not in funcs:
+        raise ValueError("method must be one of {}".format(SMOOTH_METHODS))
+    if method != "exponential":
+        kwargs["window_size"] = window_size
+    #
+    if chunk_size is None:
+        func = partial(funcs[method], axis=axis, **kwargs)
+        if out is None:
+            return func(data)
+        out[...] = func(data)
+        return out
+    if out is None:
+        out = np.empty(np.shape(data), dtype=float)
+    src = np.moveaxis(data, axis, -1)
+    dst = np.moveaxis(out, axis, -1)
+    n = src.shape[-1]
+    if method == "exponential":
+        initial = kwargs.pop("initial", None)
+        for start in range(0, n, chunk_size):
+            y_smooth = exponential(
+                src[..., start : start + chunk_size], initial=initial, **kwargs
+            )
+            dst[..., start : start + chunk_size] = y_smooth
+            initial = y_smooth[..., -1:]
+    else:
+        func = partial(funcs[method], axis=-1, **kwargs)
+        left, right = window_size // 2, (window_size - 1) // 2
+        for start in range(0, n, chunk_size):
+            stop = min(start + chunk_size, n)
+            # at least one full window, so the edges of the data are treated as a whole
+            lo = max(start - left, 0)
+            hi = min(max(stop + right, lo + window_size), n)
+            lo = max(min(lo, hi - window_size), 0)
+            y_smooth = func(src[..., lo:hi])
+            dst[..., start:stop] = y_smooth[..., start - lo : stop - lo]
+    if isinstance(out, np.memmap):
+        out.flush()
+    return out
+
+
+class StreamingSmoother:
+    """
+    Causal smoothing of data arriving in chunks, e.g. for live display
+    - the window trails the newest sample, y[i] uses x[i - window_size + 1 .. i]
+        (fewer points at the very start)
+    - method: "boxcar" / "median" / "exponential"
+    - axis: time axis of the chunks, other axes are independent traces
+    usage:
+        smoother = StreamingSmoother(window_size=5)
+        for chunk in chunks:
+            y = smoother.update(chunk)  # same shape as chunk
+    """
+
+    def __init__(
+        self,
+        window_size: int = 3,
+        method: str = "boxcar",
+        axis: int = -1,
+        alpha: float = 0.5,
+    ):
+        if method not in ("boxcar", "median", "exponential"):
+            raise ValueError("method must be boxcar, median or exponential")
+        self.window_size = window_size
+        self.method = method
+        self.axis = axis
+        self.alpha = alpha
+        self._tail = None  # last window_size - 1 samples
+        self._last = None  # last output of the exponential filter
+
+    def update(self, chunk: np.ndarray) -> np.ndarray:
+        chunk = np.moveaxis(np.asarray(chunk, dtype=float), self.axis, -1)
+        if self.method == "exponential":
+            y_smooth = exponential(chunk, self.alpha, initial=self._last)
+            if chunk.shape[-1] > 0:
+                self._last = y_smooth[..., -1:]
+            return np.moveaxis(y_smooth, -1, self.axis)
+        #
+        if self._tail is None:
+            self._tail = chunk[..., :0]
+        n_tail = self._tail.shape[-1]
+        data = np.concatenate((self._tail, chunk), axis=-1)
+        n, w = data.shape[-1], self.window_size
+        if self.method == "boxcar":
+            csum = np.zeros(data.shape[:-1] + (n + 1,))
+            np.cumsum(data, axis=-1, out=csum[..., 1:])
+            stop = np.arange(n_tail, n) + 1
+            start = np.maximum(stop - w, 0)
+            y_smooth = (csum[..., stop] - csum[..., start]) / (stop - start)
+        else:
+            pad = np.full(data.shape[:-1] + (w - 1,), np.nan)
+            windows = np.lib.stride_tricks.sliding_window_view(
+                np.concatenate((pad, data), axis=-1), w, axis=-1
+            )
+            y_smooth = np.nanmedian(windows[..., n_tail:, :], axis=-1)
+        self._tail = data[..., max(n - (w - 1), 0) :]
+        return np.moveaxis(y_smooth, -1, self.axis)
@@ -0,0 +1,148 @@
+# <<< Multi-axis sweeps on top of data_recorder: snake ordering, step-aware settling, resume. >>>
+import os
+import time
+import numpy as np
+from typing import Callable, Dict, List, Sequence, Union
+from tptb.data.aquire import data_recorder
+from tptb.data.grid import snake_order, raster_order
+
+
+def step_wait(
+    scale: Union[float, Sequence[float]],
+    min_wait: float = 0.0,
+    max_wait: Union[float, None] = None,
+) -> Callable:
+    """
+    Wait policy proportional to the step size
+    - scale: seconds per unit step, one value or one per axis
+    - the wait is min_wait + max(|step| * scale), capped at max_wait;
+        the first point waits max_wait (or min_wait if max_wait is None)
+    """
+    scale = np.asarray(scale, dtype=float)
+
+    def _wait(prev_x, x):
+        if prev_x is None:
+            t = max_wait if max_wait is not None else min_wait
+        else:
+            step = np.abs(np.atleast_1d(x) - np.atleast_1d(prev_x))
+            t = min_wait + float(np.max(step * scale))
+            if max_wait is not None:
+                t = min(t, max_wait)
+        time.sleep(t)
+
+    return _wait
+
+
+def stable_wait(
+    read_func: Callable,
+    tol: float,
+    interval: float = 0.1,
+    timeout: float = 10.0,
+    n_stable: int = 2,
+) -> Callable:
+    """
+    Wait policy that polls until the system has settled
+    - read_func: returns a scalar that settles with the actuator (e.g. a position readback)
+    - settled when n_stable successive reads differ by less than tol, or after timeout
+    """
+
+    def _wait(prev_x, x):
+        t0 = time.monotonic()
+        last = float(read_func())
+        stable = 0
+        while stable < n_stable and time.monotonic() - t0 < timeout:
+            time.sleep(interval)
+            value = float(read_func())
+            stable = stable + 1 if abs(value - last) < tol else 0
+            last = value
+
+    return _wait
+
+
+def _completed_points(
+    fileName: str, names: List[str], fmt: str, measure_num: int
+) -> set:
+    """points (tuples of axis values) that already have measure_num rows in fileName"""
+    if not os.path.exists(fileName):
+        return set()
+    if fmt == "npy":
+        from tptb.io.npyf import load_npy_columns
+
+        try:
+            data = load_npy_columns(fileName, names)
+        except FileNotFoundError:
+            return set()  # directory without a manifest yet
+        points = np.column_stack([data[name] for name in names])
+    elif fmt == "sharded":
+        from tptb.io.csvf import load_sharded_csv
+
+        try:
+            data = load_sharded_csv(fileName)
+        except FileNotFoundError:
+            return set()
+        points = data[names].to_numpy(dtype=float)
+    else:
+        import pandas as pd
+
+        # e.g. left by a crash before the header, data_recorder treats it as new
+        if os.path.getsize(fileName) == 0:
+            return set()
+        data = pd.read_csv(fileName)
+        if len(data) == 0:
+            return set()
+        points = data[names].apply(pd.to_numeric, errors="coerce").to_numpy()
+        points = points[~np.isnan(points).any(axis=1)]  # repeated header lines
+    if len(points) == 0:
+        return set()
+    unique, count = np.unique(points, axis=0, return_counts=True)
+    return set(map(tuple, unique[count >= measure_num].tolist()))
+
+
+def sweep_recorder(
+    fileName: str,
+    axes: Dict[str, np.ndarray],
+    x_func: Callable,
+    yname: Union[List[str], str],
+    y_func: Union[List[Callable], Callable],
+    order: str = "snake",
+    wait: Union[None, float, Callable] = 2.0,
+    resume: bool = True,
+    measure_num: int = 1,
+    **kwargs,
+) -> np.ndarray:
+    """
+    Multi-axis sweep with data_recorder, one column per axis
+    - axes: {name: values}, in nesting order, the last axis moves fastest
+    - x_func: x_func(point), point is an array with one value per axis
+    - order: "snake" (minimal actuator travel) / "raster"
+    - wait: as data_recorder, e.g. step_wait(...) or stable_wait(...)
+    - resume: skip points that already have measure_num rows in fileName
+    - kwargs: passed to data_recorder (fmt, concurrent, ...)
+    - Return: the points measured in this call
+    """
+    names = list(axes.keys())
+    if order == "snake":
+        points = snake_order(list(axes.values()))
+    elif order == "raster":
+        points = raster_order(list(axes.values()))
+    else:
+        raise ValueError("order must be snake or raster")
+    #
+    if resume:
+        done = _completed_points(fileName, names, kwargs.get("fmt", "csv"), measure_num)
+        if len(done) > 0:
+            todo = np.array([tuple(point) not in done for point in points.tolist()])
+            points = points[todo]
+    if len(points) > 0:
+        data_recorder(
+            fileName,
+            names,
+            yname,
+            points,
+            x_func,
+            y_func,
+            wait=wait,
+            measure_num=measure_num,
+            **kwargs,
+        )
+    return points
@@ -0,0 +1,156 @@
+# <<< Per-phase timing of acquisition loops, e.g. data_recorder(..., timer=PhaseTimer()). >>>
+import os
+import time
+import numpy as np
+from typing import Callable, Dict, List, Union
+from tptb.io.csvf import CsvWriter
+
+
+class PhaseTimer:
+    """
+    Attribute wall time to named phases of each loop iteration
+    - log_file: csv sidecar with one (iteration, phase, seconds) line per phase,
+        appended to if it exists
+    - callback: callback(iteration, {phase: seconds}) after every iteration
+    - profiler: object with enable() / disable() (e.g. cProfile.Profile()),
+        enabled only while iterations run
+    usage:
+        timer.start()
+        ...; timer.mark("x_func")    # time since the previous mark goes to "x_func"
+        ...; timer.mark("wait")
+        timer.stop()                 # end of the iteration
+        print(timer.summary())
+    as a context manager, leaving the block aborts an open iteration and closes log_file:
+        with PhaseTimer("timing.csv") as timer:
+            data_recorder(..., timer=timer)
+    """
+
+    def __init__(
+        self,
+        log_file: Union[str, None] = None,
+        callback: Union[Callable, None] = None,
+        profiler=None,
+    ):
+        self.records: Dict[str, List[float]] = {}
+        self.iteration = 0
+        self.callback = callback
+        self.profiler = profiler
+        self._writer = None
+        if log_file is not None:
+            new_file = not os.path.exists(log_file) or os.path.getsize(log_file) == 0
+            self._writer = CsvWriter(log_file)
+            if new_file:
+                self._writer.write_row(["iteration", "phase", "seconds"])
+        self._row = {}
+        self._last = None
+        self._running = False
+
+    def start(self):
+        self._row = {}
+        self._running = True
+        if self.profiler is not None:
+            self.profiler.enable()
+        self._last = time.perf_counter()
+
+    def mark(self, phase: str):
+        now = time.perf_counter()
+        self._row[phase] = self._row.get(phase, 0.0) + now - self._last
+        self._last = now
+
+    def stop(self):
+        self._running = False
+        if self.profiler is not None:
+            self.profiler.disable()
+        for phase, seconds in self._row.items():
+            self.records.setdefault(phase, []).append(seconds)
+            if self._writer is not None:
+                self._writer.write_row([self.iteration, phase, seconds])
+        if self.callback is not None:
+            self.callback(self.iteration, self._row)
+        self.iteration += 1
+
+    def abort(self):
+        """end an open iteration without recording it, e.g. when the loop raised"""
+        if not self._running:
+            return
+        self._running = False
+        self._row = {}
+        if self.profiler is not None:
+            self.profiler.disable()
+
+    def close(self):
+        self.abort()
+        if self._writer is not None:
+            self._writer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def summary_table(self) -> Dict[str, Dict[str, float]]:
+        """{phase: {count, total, mean, min, max, fraction}}"""
+        totals = {phase: float(np.sum(s)) for phase, s in self.records.items()}
+        grand = sum(totals.values())
+        table = {}
+        for phase, seconds in self.records.items():
+            table[phase] = dict(
+                count=len(seconds),
+                total=totals[phase],
+                mean=float(np.mean(seconds)),
+                min=float(np.min(seconds)),
+                max=float(np.max(seconds)),
+                fraction=totals[phase] / grand if grand > 0 else 0.0,
+            )
+        return table
+
+    def summary(self) -> str:
+        """summary_table as text, slowest phase first"""
+        table = self.summary_table()
+        lines = [
+            "{:<20s}{:>8s}{:>12s}{:>12s}{:>12s}{:>12s}{:>8s}".format(
+                "phase", "count", "total(s)", "mean(ms)", "min(ms)", "max(ms)", "%"
+            )
+        ]
+        for phase, row in sorted(table.items(), key=lambda item: -item[1]["total"]):
+            lines.append(
+                "{:<20s}{:>8d}{:>12.4f}{:>12.3f}{:>12.3f}{:>12.3f}{:>8.1f}".format(
+                    phase,
+                    row["count"],
+                    row["total"],
+                    row["mean"] * 1e3,
+                    row["min"] * 1e3,
+                    row["max"] * 1e3,
+                    row["fraction"] * 100,
+                )
+            )
+        return "\n".join(lines)
+
+
+class _NoTimer:
+    """stands in for PhaseTimer when timing is off, every call is a no-op"""
+
+    def start(self):
+        pass
+
+    def mark(self, phase: str):
+        pass
+
+    def stop(self):
+        pass
+
+    def abort(self):
+        pass
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        pass
+
+
+NO_TIMER = _NoTimer()
@@ -0,0 +1,30 @@
+"""read/write files, submodules are imported on first use"""
+
+from tptb._lazy import lazy_attributes
+
+__getattr__, __dir__ = lazy_attributes(
+    __name__,
+    {
+        "csvf": [
+            "CsvWriter",
+            "csv_append_line",
+            "csv_append_data",
+            "load_csv_data_with_stat",
+            "GROUP_STATS",
+            "group_stat",
+            "ShardedCsvWriter",
+            "load_sharded_csv",
+            "merge_shards",
+        ],
+        "npyf": [
+            "NpyWriter",
+            "load_npy_columns",
+            "compact_npy",
+            "load_npy_data_with_stat",
+            "csv_to_npy",
+            "npy_to_csv",
+        ],
+        "streamstat": ["STREAM_STATS", "RunningGroupStat", "CsvStatLoader"],
+        "tail": ["CsvTail", "plot_tail"],
+    },
+)
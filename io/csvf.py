@@ -1,12 +1,197 @@
 import csv
-import pandas as pd
+import glob
+import io
+import os
+import socket
+import time
 import numpy as np
-from typing import Callable, Union, List, Tuple
+from typing import Callable, Union, List, Sequence, Tuple
+
+
+class CsvWriter:
+    """
+    Long-lived, buffered csv appender, same on-disk format as csv_append_line
+    - fileName: file name, opened in append mode
+    - flush_rows: flush after this many buffered rows
+    - flush_interval: flush when the last flush is older than this (seconds), checked on write
+    - fsync: also os.fsync on every flush, for crash safety
+    usage:
+        with CsvWriter("data.csv") as writer:
+            writer.write_row([x, y])
+    """
+
+    def __init__(
+        self,
+        fileName: str,
+        flush_rows: int = 100,
+        flush_interval: float = 1.0,
+        fsync: bool = False,
+    ):
+        self.fileName = fileName
+        self.flush_rows = flush_rows
+        self.flush_interval = flush_interval
+        self.fsync = fsync
+        self._file = open(fileName, "a", newline="")
+        self._writer = csv.writer(
+            self._file,
+            delimiter=",",
+            quoting=csv.QUOTE_MINIMAL,
+        )
+        self._pending = 0
+        self._last_flush = time.monotonic()
+
+    def write_row(self, data: Union[np.ndarray, List[Union[str, int, float]]]):
+        self._writer.writerow(data)
+        self._pending += 1
+        self._maybe_flush()
+
+    def write_data(
+        self,
+        x: Union[int, float, str],
+        y: Union[np.ndarray, List[Union[str, int, float]]],
+    ):
+        # using x,y[0],y[1],... append a line
+        self.write_row([x, *y])
+
+    def write_block(self, block: np.ndarray):
+        """append every row of a 2D array"""
+        block = np.asarray(block)
+        if block.ndim == 1:
+            block = block[None, :]
+        self._writer.writerows(block.tolist())
+        self._pending += len(block)
+        self._maybe_flush()
+
+    def _maybe_flush(self):
+        if (
+            self._pending >= self.flush_rows
+            or time.monotonic() - self._last_flush >= self.flush_interval
+        ):
+            self.flush()
+
+    def flush(self):
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+        self._pending = 0
+        self._last_flush = time.monotonic()
+
+    def close(self):
+        if not self._file.closed:
+            self.flush()
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class ShardedCsvWriter(CsvWriter):
+    """
+    CsvWriter for one of several processes recording into the same directory
+    - every writer appends to its own shard dirName/shard_<host>_<pid>_<ns>.csv,
+        so concurrent writers never share a file (no locks, no interleaved rows)
+    - columns: data columns, each row gets seq (0, 1, ... per shard) and
+        timestamp (time.time()) in front
+    - read the merged, time-ordered view with load_sharded_csv, or pass dirName
+        to load_csv_data_with_stat, merge_shards compacts it into one csv file
+    """
+
+    def __init__(
+        self,
+        dirName: str,
+        columns: List[str],
+        flush_rows: int = 100,
+        flush_interval: float = 1.0,
+        fsync: bool = False,
+    ):
+        os.makedirs(dirName, exist_ok=True)
+        shard = "shard_{:s}_{:d}_{:d}.csv".format(
+            socket.gethostname(), os.getpid(), time.time_ns()
+        )
+        super().__init__(
+            os.path.join(dirName, shard),
+            flush_rows=flush_rows,
+            flush_interval=flush_interval,
+            fsync=fsync,
+        )
+        self.dirName = dirName
+        self.seq = 0
+        super().write_row(["seq", "timestamp", *columns])
+        self.flush()
+
+    def write_row(self, data: Union[np.ndarray, List[Union[str, int, float]]]):
+        super().write_row([self.seq, repr(time.time()), *data])
+        self.seq += 1
+
+    def write_block(self, block: np.ndarray):
+        """append every row of a 2D array, all with the same timestamp"""
+        block = np.asarray(block)
+        if block.ndim == 1:
+            block = block[None, :]
+        rows = block.tolist()
+        now = repr(time.time())
+        self._writer.writerows([self.seq + i, now, *row] for i, row in enumerate(rows))
+        self.seq += len(rows)
+        self._pending += len(rows)
+        self._maybe_flush()
+
+
+def _read_shard(fileName: str):
+    """one shard as a DataFrame, a torn last line (writer still running or crashed) is left out"""
+    import pandas as pd
+
+    with open(fileName, "rb") as f:
+        data = f.read()
+    data = data[: data.rfind(b"\n") + 1]
+    if len(data) == 0:
+        return None
+    return pd.read_csv(io.BytesIO(data))
+
+
+def load_sharded_csv(dirName: str):
+    """
+    All shards written by ShardedCsvWriter into dirName, as one DataFrame
+    ordered by timestamp (then shard, then seq), with columns seq, timestamp, ...
+    """
+    import pandas as pd
+
+    shards = sorted(glob.glob(os.path.join(dirName, "shard_*.csv")))
+    frames = [frame for frame in map(_read_shard, shards) if frame is not None]
+    if len(frames) == 0:
+        raise FileNotFoundError("no shards in {:s}".format(dirName))
+    data = pd.concat(frames, ignore_index=True)
+    return data.sort_values("timestamp", kind="stable", ignore_index=True)
+
+
+def merge_shards(dirName: str, fileName: str, remove: bool = False):
+    """
+    Compact the shards of dirName into one time-ordered csv file (written atomically)
+    - remove: delete the merged shards afterwards, only when no writer is running
+    """
+    shards = sorted(glob.glob(os.path.join(dirName, "shard_*.csv")))
+    data = load_sharded_csv(dirName)
+    tmpName = fileName + ".tmp"
+    data.to_csv(tmpName, index=False)
+    os.replace(tmpName, fileName)
+    if remove:
+        for shard in shards:
+            os.remove(shard)
 
 
 def csv_append_line(
-    fileName: str, data: Union[np.ndarray, List[Union[str, int, float]]]
+    fileName: str,
+    data: Union[np.ndarray, List[Union[str, int, float]]],
+    writer: Union[CsvWriter, None] = None,
 ):
+    """
+    - writer: write through an open CsvWriter instead of opening fileName
+    """
+    if writer is not None:
+        writer.write_row(data)
+        return
     with open(fileName, "a", newline="") as csvfile:
         csv_writer = csv.writer(
             csvfile,
@@ -20,49 +205,120 @@ def csv_append_data(
     fileName: str,
     x: Union[int, float, str],
     y: Union[np.ndarray, List[Union[str, int, float]]],
+    writer: Union[CsvWriter, None] = None,
 ):
     # using x,y[0],y[1],... append a line
-    csv_append_line(fileName, [x, *y])
+    csv_append_line(fileName, [x, *y], writer=writer)
+
 
+def _simple_load_csv_data(
+    fileName: str, key_x: str, key_y: Union[str, List[str]]
+) -> Tuple[np.ndarray, np.ndarray]:
+    import pandas as pd
 
-def _simple_load_csv_data(fileName: str, key_x: str, key_y: str):
-    data = pd.read_csv(fileName)
+    if os.path.isdir(fileName):
+        data = load_sharded_csv(fileName)
+    else:
+        data = pd.read_csv(fileName)
     datax = data[key_x].to_numpy()
-    datay = data[key_y].to_numpy()
+    datay = data[key_y].to_numpy()  # 2D for a list of keys
     return datax, datay
 
 
 def load_csv_data_with_stat(
     fileName: str,
     key_x: str,
-    key_y: str,
+    key_y: Union[str, List[str]],
     select_func: Union[Callable, None] = None,
-) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    stats: Sequence[str] = ("mean", "std"),
+) -> Tuple[np.ndarray, ...]:
     """
     For each unique x, calculate mean and std of y
-    - fileName: file name
-    - key_x, key_y: column names
+    - fileName: file name, or a directory of ShardedCsvWriter shards
+    - key_x, key_y: column names, key_y can be a list of columns
     - select_func: function to select data (optional)
+    - stats: statistics to return after x, see group_stat
+    - Return: (x, mean, std) by default
     """
     datax, datay = _simple_load_csv_data(fileName, key_x, key_y)
-    #
+    return _data_with_stat(datax, datay, select_func, stats)
+
+
+def _data_with_stat(
+    datax: np.ndarray,
+    datay: np.ndarray,
+    select_func: Union[Callable, None] = None,
+    stats: Sequence[str] = ("mean", "std"),
+) -> Tuple[np.ndarray, ...]:
+    """Select, then group_stat, shared by the loaders"""
     if select_func is not None:
         select_mask = select_func(datax, datay)
         datax = datax[select_mask]
         datay = datay[select_mask]
     #
-    x_set = sorted(list(set(datax)))
-    mean_y_list = []
-    std_y_list = []
-    for x in x_set:
-        x_mask = datax == x
-        y_x = datay[x_mask]
-        mean_y = np.mean(y_x)
-        std_y = np.std(y_x)
-        mean_y_list.append(mean_y)
-        std_y_list.append(std_y)
-
-    return np.array(x_set), np.array(mean_y_list), np.array(std_y_list)
+    return group_stat(datax, datay, stats)
+
+
+GROUP_STATS = ("mean", "std", "count", "sem", "median", "min", "max")
+
+
+def group_stat(
+    datax: np.ndarray,
+    datay: np.ndarray,
+    stats: Sequence[str] = ("mean", "std"),
+) -> Tuple[np.ndarray, ...]:
+    """
+    Statistics of y for each unique x, in one sort instead of one scan per x
+    - datax: (N,)
+    - datay: (N,) or (N, Y) for several y columns at once
+    - stats: any of GROUP_STATS
+        - std: population std (ddof=0), as np.std
+        - sem: standard error of the mean, std (ddof=1) / sqrt(count)
+    - Return: (x_set, *stats), each stat is (U,) or (U, Y)
+    """
+    for stat in stats:
+        if stat not in GROUP_STATS:
+            raise ValueError("unknown stat {:s}, use {}".format(stat, GROUP_STATS))
+    datay = np.asarray(datay)
+    y = (datay if datay.ndim == 2 else datay[:, None]).astype(float, copy=False)
+    #
+    x_set, inverse, count = np.unique(datax, return_inverse=True, return_counts=True)
+    if len(x_set) == 0:
+        res = {stat: np.empty((0,) + datay.shape[1:]) for stat in stats}
+        res["count"] = np.empty(0, dtype=int)
+        return (x_set,) + tuple(res[stat] for stat in stats)
+    # group rows together, each group starts at `starts`
+    order = np.argsort(inverse, kind="stable")
+    inverse = inverse.reshape(-1)[order]
+    y = y[order]
+    starts = np.concatenate(([0], np.cumsum(count)[:-1]))
+    n = count[:, None]
+    #
+    res = {}
+    res["count"] = count
+    mean = np.add.reduceat(y, starts, axis=0) / n
+    res["mean"] = mean
+    if "std" in stats or "sem" in stats:
+        sq = np.add.reduceat((y - mean[inverse]) ** 2, starts, axis=0)
+        res["std"] = np.sqrt(sq / n)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            res["sem"] = np.sqrt(sq / (n - 1)) / np.sqrt(n)
+    if "min" in stats:
+        res["min"] = np.minimum.reduceat(y, starts, axis=0)
+    if "max" in stats:
+        res["max"] = np.maximum.reduceat(y, starts, axis=0)
+    if "median" in stats:
+        # sort y inside each group, then pick the middle element(s)
+        y_sorted = np.empty_like(y)
+        for k in range(y.shape[1]):
+            y_sorted[:, k] = y[np.lexsort((y[:, k], inverse)), k]
+        lo = starts + (count - 1) // 2
+        hi = starts + count // 2
+        res["median"] = (y_sorted[lo] + y_sorted[hi]) / 2
+    #
+    if datay.ndim == 1:
+        res = {stat: arr[:, 0] if arr.ndim == 2 else arr for stat, arr in res.items()}
+    return (x_set,) + tuple(res[stat] for stat in stats)
 
 
 if __name__ == "__main__":
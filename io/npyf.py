@@ -0,0 +1,239 @@
+# <<< Append-only chunked binary storage, an alternative to csv for acquired data. >>>
+# <<< A dataset is a directory:
+#   manifest.json            {"columns": [...], "dtype": "<f8", "chunks": [rows_0, rows_1, ...]}
+#   c{j}_{i:06d}.npy         column j of chunk i, 1D .npy, its first chunks[i] entries are valid
+# Rows are only ever appended in place to the last chunk, older chunks are immutable,
+# so readers can np.memmap them without copies. >>>
+import json
+import os
+import time
+import numpy as np
+from typing import Callable, Dict, List, Sequence, Tuple, Union
+from tptb.io.csvf import CsvWriter, _data_with_stat
+
+_MANIFEST = "manifest.json"
+
+
+def _chunk_name(dirName: str, j: int, i: int) -> str:
+    return os.path.join(dirName, "c{:d}_{:06d}.npy".format(j, i))
+
+
+def _read_manifest(dirName: str) -> dict:
+    with open(os.path.join(dirName, _MANIFEST)) as f:
+        return json.load(f)
+
+
+def _write_manifest(dirName: str, manifest: dict):
+    # atomic: readers see either the old or the new manifest
+    tmpName = os.path.join(dirName, _MANIFEST + ".tmp")
+    with open(tmpName, "w") as f:
+        json.dump(manifest, f)
+    os.replace(tmpName, os.path.join(dirName, _MANIFEST))
+
+
+def _save_atomic(fileName: str, arr: np.ndarray):
+    tmpName = fileName + ".tmp"
+    with open(tmpName, "wb") as f:
+        np.save(f, arr)
+    os.replace(tmpName, fileName)
+
+
+class NpyWriter:
+    """
+    Append rows to a chunked .npy dataset, same interface as CsvWriter
+    - dirName: dataset directory, created if missing, appended to otherwise
+    - columns: column names, must match an existing dataset
+    - chunk_rows: rows per chunk file
+    - flush_interval: flush when the last flush is older than this (seconds), checked on write
+    usage:
+        with NpyWriter("data.npyd", ["x", "y"]) as writer:
+            writer.write_data(x, [y])
+    """
+
+    def __init__(
+        self,
+        dirName: str,
+        columns: Sequence[str],
+        chunk_rows: int = 4096,
+        flush_interval: float = 1.0,
+        dtype=np.float64,
+    ):
+        self.dirName = dirName
+        self.columns = list(columns)
+        self.chunk_rows = chunk_rows
+        self.flush_interval = flush_interval
+        self.dtype = np.dtype(dtype)
+        #
+        if os.path.exists(os.path.join(dirName, _MANIFEST)):
+            self._manifest = _read_manifest(dirName)
+            assert self._manifest["columns"] == self.columns, "columns mismatch"
+            assert np.dtype(self._manifest["dtype"]) == self.dtype, "dtype mismatch"
+        else:
+            os.makedirs(dirName, exist_ok=True)
+            self._manifest = {"columns": self.columns, "dtype": self.dtype.str}
+            self._manifest["chunks"] = []
+            _write_manifest(dirName, self._manifest)
+        # a new chunk for every writer, existing chunks are never touched
+        self._buffer = np.empty((chunk_rows, len(self.columns)), dtype=self.dtype)
+        self._n = 0
+        self._flushed = 0
+        self._maps = None  # memmapped files of the open chunk, one per column
+        self._last_flush = time.monotonic()
+
+    def write_row(self, data: Union[np.ndarray, List[float]]):
+        self.write_block(np.asarray(data, dtype=self.dtype)[None, :])
+
+    def write_data(self, x: float, y: Union[np.ndarray, List[float]]):
+        # using x,y[0],y[1],... append a line
+        self.write_row([x, *y])
+
+    def write_block(self, block: np.ndarray):
+        """append every row of a 2D array"""
+        block = np.asarray(block, dtype=self.dtype)
+        if block.ndim == 1:
+            block = block[None, :]
+        assert block.shape[1] == len(self.columns), "wrong number of columns"
+        while len(block) > 0:
+            n = min(self.chunk_rows - self._n, len(block))
+            self._buffer[self._n : self._n + n] = block[:n]
+            self._n += n
+            block = block[n:]
+            if self._n == self.chunk_rows:
+                self._flush_chunk()
+                self._maps = None
+                self._n = 0
+                self._flushed = 0
+        if time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def _flush_chunk(self):
+        """
+        Append the rows written since the last flush to the files of the current chunk,
+        then count them in the manifest (the chunk is listed there on its first flush)
+        """
+        chunks = self._manifest["chunks"]
+        if self._maps is None:
+            i = len(chunks)
+            self._maps = [
+                np.lib.format.open_memmap(
+                    _chunk_name(self.dirName, j, i),
+                    mode="w+",
+                    dtype=self.dtype,
+                    shape=(self.chunk_rows,),
+                )
+                for j in range(len(self.columns))
+            ]
+        for j, column in enumerate(self._maps):
+            column[self._flushed : self._n] = self._buffer[self._flushed : self._n, j]
+            column.flush()
+        # the manifest only counts rows that are already on disk
+        if self._flushed == 0:
+            chunks.append(self._n)
+        else:
+            chunks[-1] = self._n
+        _write_manifest(self.dirName, self._manifest)
+        self._flushed = self._n
+        self._last_flush = time.monotonic()
+
+    def flush(self):
+        if self._n > self._flushed:
+            self._flush_chunk()
+        self._last_flush = time.monotonic()
+
+    def close(self):
+        self.flush()
+        self._maps = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def load_npy_columns(
+    dirName: str, keys: Union[Sequence[str], None] = None
+) -> Dict[str, np.ndarray]:
+    """
+    Load columns of a chunked .npy dataset
+    - keys: column names, None for all columns
+    - single-chunk datasets (see compact_npy) are returned as read-only np.memmap, no copy
+    """
+    manifest = _read_manifest(dirName)
+    columns = manifest["columns"]
+    keys = columns if keys is None else list(keys)
+    data = {}
+    for key in keys:
+        j = columns.index(key)
+        parts = [
+            np.load(_chunk_name(dirName, j, i), mmap_mode="r")[:rows]
+            for i, rows in enumerate(manifest["chunks"])
+        ]
+        if len(parts) == 1:
+            data[key] = parts[0]
+        elif len(parts) == 0:
+            data[key] = np.empty(0, dtype=manifest["dtype"])
+        else:
+            data[key] = np.concatenate(parts)
+    return data
+
+
+def compact_npy(dirName: str):
+    """Merge all chunks into one chunk per column, for zero-copy loads"""
+    manifest = _read_manifest(dirName)
+    if len(manifest["chunks"]) <= 1:
+        return
+    data = load_npy_columns(dirName)
+    old_chunks = len(manifest["chunks"])
+    for j, key in enumerate(manifest["columns"]):
+        _save_atomic(_chunk_name(dirName, j, 0), data[key])
+    manifest["chunks"] = [int(len(data[manifest["columns"][0]]))]
+    _write_manifest(dirName, manifest)
+    for j in range(len(manifest["columns"])):
+        for i in range(1, old_chunks):
+            os.remove(_chunk_name(dirName, j, i))
+
+
+def _simple_load_npy_data(
+    dirName: str, key_x: str, key_y: Union[str, List[str]]
+) -> Tuple[np.ndarray, np.ndarray]:
+    keys_y = [key_y] if isinstance(key_y, str) else list(key_y)
+    data = load_npy_columns(dirName, [key_x] + keys_y)
+    if isinstance(key_y, str):
+        return data[key_x], data[key_y]
+    return data[key_x], np.column_stack([data[key] for key in keys_y])
+
+
+def load_npy_data_with_stat(
+    dirName: str,
+    key_x: str,
+    key_y: Union[str, List[str]],
+    select_func: Union[Callable, None] = None,
+    stats: Sequence[str] = ("mean", "std"),
+) -> Tuple[np.ndarray, ...]:
+    """
+    For each unique x, calculate mean and std of y, as load_csv_data_with_stat
+    - dirName: dataset directory
+    - key_x, key_y: column names, key_y can be a list of columns
+    - select_func: function to select data (optional)
+    - stats: statistics to return after x, see group_stat
+    """
+    datax, datay = _simple_load_npy_data(dirName, key_x, key_y)
+    return _data_with_stat(datax, datay, select_func, stats)
+
+
+def csv_to_npy(fileName: str, dirName: str, chunk_rows: int = 4096):
+    """Convert a csv file written by data_recorder (one header line) to a .npy dataset"""
+    import pandas as pd
+
+    data = pd.read_csv(fileName)
+    with NpyWriter(dirName, list(data.columns), chunk_rows=chunk_rows) as writer:
+        writer.write_block(data.to_numpy(dtype=writer.dtype))
+
+
+def npy_to_csv(dirName: str, fileName: str):
+    """Convert a .npy dataset to the csv layout written by data_recorder"""
+    data = load_npy_columns(dirName)
+    with CsvWriter(fileName) as writer:
+        writer.write_row(list(data.keys()))
+        writer.write_block(np.column_stack(list(data.values())))
@@ -0,0 +1,209 @@
+# <<< Incremental per-x statistics over data files that keep growing (e.g. written by data_recorder). >>>
+# <<< Only the newly appended bytes are parsed on each refresh (see tptb.io.tail), aggregates are merged
+# with Chan's parallel form of Welford's algorithm. >>>
+import os
+import numpy as np
+from typing import Callable, List, Sequence, Tuple, Union
+from tptb.io.csvf import group_stat
+from tptb.io.tail import CsvTail
+
+STREAM_STATS = ("mean", "std", "count", "sem", "min", "max")
+
+
+class RunningGroupStat:
+    """
+    Running count / mean / variance / min / max of y for each unique x
+    - update with new rows as they arrive, memory is O(number of unique x)
+    """
+
+    def __init__(self):
+        self.x = np.empty(0)
+        self.count = np.empty(0, dtype=np.int64)
+        self.mean = None
+        self.m2 = None  # sum of squared deviations from the mean
+        self.min = None
+        self.max = None
+
+    def update(self, datax: np.ndarray, datay: np.ndarray):
+        """
+        - datax: (N,)
+        - datay: (N,) or (N, Y)
+        """
+        datax = np.asarray(datax, dtype=float)
+        datay = np.asarray(datay, dtype=float)
+        if len(datax) == 0:
+            return
+        x, mean, std, count, mn, mx = group_stat(
+            datax, datay, ("mean", "std", "count", "min", "max")
+        )
+        if datay.ndim == 1:
+            mean, std, mn, mx = mean[:, None], std[:, None], mn[:, None], mx[:, None]
+        m2 = std**2 * count[:, None]
+        if self.mean is None:
+            self.x, self.count, self.mean, self.m2 = x, count, mean, m2
+            self.min, self.max = mn, mx
+            self._ndim = datay.ndim
+            return
+        # merge both sets of groups on the union of x
+        x_all = np.union1d(self.x, x)
+        i_old = np.searchsorted(x_all, self.x)
+        i_new = np.searchsorted(x_all, x)
+        shape = (len(x_all), mean.shape[1])
+        count_all = np.zeros(len(x_all), dtype=np.int64)
+        count_all[i_old] += self.count
+        count_all[i_new] += count
+        n_a = np.zeros(shape)
+        n_a[i_old] = self.count[:, None]
+        n_b = np.zeros(shape)
+        n_b[i_new] = count[:, None]
+        mean_a = np.zeros(shape)
+        mean_a[i_old] = self.mean
+        mean_b = np.zeros(shape)
+        mean_b[i_new] = mean
+        m2_all = np.zeros(shape)
+        m2_all[i_old] += self.m2
+        m2_all[i_new] += m2
+        n = n_a + n_b
+        delta = mean_b - mean_a
+        mean_all = mean_a + delta * n_b / n
+        m2_all += delta**2 * n_a * n_b / n
+        min_all = np.full(shape, np.inf)
+        min_all[i_old] = self.min
+        min_all[i_new] = np.minimum(min_all[i_new], mn)
+        max_all = np.full(shape, -np.inf)
+        max_all[i_old] = self.max
+        max_all[i_new] = np.maximum(max_all[i_new], mx)
+        #
+        self.x, self.count, self.mean, self.m2 = x_all, count_all, mean_all, m2_all
+        self.min, self.max = min_all, max_all
+
+    def result(self, stats: Sequence[str] = ("mean", "std")) -> Tuple[np.ndarray, ...]:
+        """
+        - stats: any of STREAM_STATS, same meaning as in group_stat
+        - Return: (x_set, *stats)
+        """
+        for stat in stats:
+            if stat not in STREAM_STATS:
+                raise ValueError("unknown stat {:s}, use {}".format(stat, STREAM_STATS))
+        if self.mean is None:
+            return (self.x,) + tuple(np.empty(0) for _ in stats)
+        n = self.count[:, None]
+        res = {"mean": self.mean, "min": self.min, "max": self.max}
+        res["std"] = np.sqrt(self.m2 / n)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            res["sem"] = np.sqrt(self.m2 / (n - 1)) / np.sqrt(n)
+        if self._ndim == 1:
+            res = {stat: arr[:, 0] for stat, arr in res.items()}
+        res["count"] = self.count
+        return (self.x,) + tuple(res[stat] for stat in stats)
+
+    def state(self) -> dict:
+        """arrays to save / restore with from_state"""
+        if self.mean is None:
+            return {}
+        return dict(
+            x=self.x,
+            count=self.count,
+            mean=self.mean,
+            m2=self.m2,
+            min=self.min,
+            max=self.max,
+            ndim=np.array(self._ndim),
+        )
+
+    @classmethod
+    def from_state(cls, state: dict) -> "RunningGroupStat":
+        stat = cls()
+        if len(state) > 0:
+            stat.x, stat.count = state["x"], state["count"]
+            stat.mean, stat.m2 = state["mean"], state["m2"]
+            stat.min, stat.max = state["min"], state["max"]
+            stat._ndim = int(state["ndim"])
+        return stat
+
+
+class CsvStatLoader:
+    """
+    Stateful load_csv_data_with_stat for a growing csv file
+    - fileName, key_x, key_y, select_func: as load_csv_data_with_stat,
+        select_func is applied to each new block of rows, so it must be row-wise
+    - cache: keep the aggregates and byte offset in a sidecar file fileName + ".stat.npz",
+        so the next session also starts from where the last one stopped
+    - block_bytes: parse at most this many bytes at once, memory stays bounded
+    usage:
+        loader = CsvStatLoader("data.csv", "x", "y")
+        x, mean, std = loader.refresh()  # call again later, only new rows are read
+    """
+
+    def __init__(
+        self,
+        fileName: str,
+        key_x: str,
+        key_y: Union[str, List[str]],
+        select_func: Union[Callable, None] = None,
+        cache: bool = False,
+        block_bytes: int = 2**26,
+    ):
+        self.fileName = fileName
+        self.key_x = key_x
+        self.key_y = key_y
+        self.select_func = select_func
+        self.cache = cache
+        self.cacheName = fileName + ".stat.npz"
+        keys_y = [key_y] if isinstance(key_y, str) else list(key_y)
+        self.tail = CsvTail(fileName, [key_x] + keys_y, block_bytes=block_bytes)
+        self.stat = RunningGroupStat()
+        if cache and os.path.exists(self.cacheName):
+            self._load_cache()
+
+    def _reset(self):
+        self.tail.reset()
+        self.stat = RunningGroupStat()
+
+    def _load_cache(self):
+        with np.load(self.cacheName, allow_pickle=False) as f:
+            state = dict(f)
+        if list(state.pop("keys")) != self.tail.columns:
+            return  # cache of another column selection
+        self.tail.offset = int(state.pop("offset"))
+        self.tail.header = list(state.pop("columns"))
+        self.stat = RunningGroupStat.from_state(state)
+
+    def _save_cache(self):
+        tmpName = self.cacheName + ".tmp.npz"
+        np.savez(
+            tmpName,
+            keys=np.array(self.tail.columns),
+            offset=np.array(self.tail.offset),
+            columns=np.array(self.tail.header),
+            **self.stat.state(),
+        )
+        os.replace(tmpName, self.cacheName)
+
+    def update(self, block: np.ndarray):
+        """
+        Add rows to the statistics
+        - block: (n, 1 + Y) float rows of key_x, *key_y, e.g. from CsvTail
+        """
+        block = block[~np.isnan(block[:, 0])]
+        datax = block[:, 0]
+        datay = block[:, 1] if isinstance(self.key_y, str) else block[:, 1:]
+        if self.select_func is not None:
+            select_mask = self.select_func(datax, datay)
+            datax = datax[select_mask]
+            datay = datay[select_mask]
+        self.stat.update(datax, datay)
+
+    def refresh(self, stats: Sequence[str] = ("mean", "std")) -> Tuple[np.ndarray, ...]:
+        """
+        Parse the rows appended since the last refresh (a partial last line waits for the next one)
+        - stats: any of STREAM_STATS
+        - Return: (x, mean, std) by default
+        """
+        if os.path.getsize(self.fileName) < self.tail.offset:
+            self._reset()  # file was truncated or replaced
+        for block in self.tail.blocks():
+            self.update(block)
+        if self.cache and self.tail.header is not None:
+            self._save_cache()
+        return self.stat.result(stats)
@@ -0,0 +1,134 @@
+# <<< Follow a growing csv file (e.g. written by data_recorder) by byte offset, like `tail -f`. >>>
+# <<< Each read parses only the bytes appended since the previous one, so watching a long
+# scan costs the same at the first row as at the millionth. >>>
+import csv
+import io
+import os
+import time
+import numpy as np
+from typing import Iterator, List, Union
+
+
+class CsvTail:
+    """
+    Read the rows appended to a csv file (one header line) since the last read
+    - columns: columns to return, default: all
+    - block_bytes: parse at most this many bytes at once, memory stays bounded
+    - a partial last line waits for the next read, repeated header lines are skipped,
+        a truncated or replaced file is read again from the start
+    usage:
+        tail = CsvTail("data.csv", ["x", "y"])
+        for block in tail.follow(interval=0.5):  # (n, 2) float arrays
+            ...
+    """
+
+    def __init__(
+        self,
+        fileName: str,
+        columns: Union[List[str], None] = None,
+        block_bytes: int = 2**26,
+    ):
+        self.fileName = fileName
+        self.columns = columns
+        self.block_bytes = block_bytes
+        self.header = None  # column names of the file
+        self.offset = 0  # bytes consumed
+
+    def reset(self):
+        self.header = None
+        self.offset = 0
+
+    def _parse(self, data: bytes) -> np.ndarray:
+        import pandas as pd
+
+        df = pd.read_csv(io.BytesIO(data), header=None, names=self.header, dtype=str)
+        df = df[df[self.header[0]] != self.header[0]]  # repeated header lines
+        columns = self.columns if self.columns is not None else self.header
+        return df[columns].apply(pd.to_numeric, errors="coerce").to_numpy(float)
+
+    def blocks(self) -> Iterator[np.ndarray]:
+        """
+        new rows, in blocks of at most block_bytes, self.offset is advanced per block
+        once it is parsed, so a block that fails to parse is read again next time
+        """
+        if not os.path.exists(self.fileName):
+            return
+        if os.path.getsize(self.fileName) < self.offset:
+            self.reset()  # file was truncated or replaced
+        with open(self.fileName, "rb") as f:
+            f.seek(self.offset)
+            if self.header is None:
+                header = f.readline()
+                if not header.endswith(b"\n"):
+                    return
+                self.header = next(csv.reader([header.decode().rstrip("\r\n")]))
+                self.offset = f.tell()
+            while True:
+                data = f.read(self.block_bytes)
+                end = data.rfind(b"\n") + 1
+                if end == 0:
+                    if len(data) == self.block_bytes:
+                        raise ValueError("a line is longer than block_bytes")
+                    return
+                block = self._parse(data[:end])
+                self.offset += end
+                f.seek(self.offset)
+                yield block
+
+    def read(self) -> np.ndarray:
+        """all new rows, (n, n_columns), n may be 0"""
+        blocks = list(self.blocks())
+        if len(blocks) == 0:
+            n_columns = len(
+                self.columns if self.columns is not None else self.header or []
+            )
+            return np.empty((0, n_columns))
+        return np.concatenate(blocks)
+
+    def follow(
+        self, interval: float = 0.5, timeout: Union[float, None] = None
+    ) -> Iterator[np.ndarray]:
+        """
+        Yield each non-empty block of new rows, polling every interval seconds
+        - timeout: stop after this many seconds without new rows, None: never
+        """
+        last = time.monotonic()
+        while True:
+            for block in self.blocks():
+                if len(block) > 0:
+                    last = time.monotonic()
+                    yield block
+            if timeout is not None and time.monotonic() - last >= timeout:
+                return
+            time.sleep(interval)
+
+
+def plot_tail(
+    fileName: str,
+    columns: List[str],
+    HIST_LENGTH: int = 1000,
+    interval: float = 0.2,
+    layout: Union[List[int], None] = None,
+    fps: float = 30.0,
+    duration: Union[float, None] = None,
+):
+    """
+    Live plot of the last HIST_LENGTH rows of columns of a growing csv file
+    - interval: poll the file this often (seconds)
+    - layout, fps: as MplInteractive
+    - duration: stop after this many seconds, None: when the figure is closed
+    """
+    from tptb.mpl.interactive import MplInteractive
+
+    tail = CsvTail(fileName, columns)
+    plot = MplInteractive(
+        tail.read,
+        HIST_LENGTH=HIST_LENGTH,
+        n_traces=len(columns),
+        layout=layout,
+        fps=fps,
+        interval=interval,
+        blocks=True,
+    )
+    plot.start_session(duration=duration)
+    return plot
@@ -0,0 +1,18 @@
+"""utils for matplotlib, submodules (and matplotlib) are imported on first use"""
+
+from tptb._lazy import lazy_attributes
+
+__getattr__, __dir__ = lazy_attributes(
+    __name__,
+    {
+        "demo": ["draw_grid", "draw_markers", "add_title"],
+        "export": ["FigureSpec", "spec_hash", "render_figure", "export_figures"],
+        "interactive": [
+            "RingBuffer",
+            "MplInteractive",
+            "plot_alignment_2d",
+            "plot_ion_position_transmission",
+        ],
+        "util": ["mpl_default_colors", "circle_mask"],
+    },
+)
@@ -1,47 +1,86 @@
 import numpy as np
-import matplotlib.pyplot as plt
-import matplotlib.lines as mlines
+from matplotlib.axes import Axes
+import matplotlib.collections as mcollections
+import matplotlib.markers as mmarkers
+import matplotlib.transforms as mtransforms
+from typing import Union
 
 
 def draw_grid(
-    ax: plt.Axes, N: int, x0: float, x1: float, y0: float, y1: float, **kwargs
-) -> plt.Axes:
+    ax: Axes, N: int, x0: float, x1: float, y0: float, y1: float, **kwargs
+) -> Axes:
     """
-    Draw a grid on the current axis.
+    Draw a grid on the current axis, as a single LineCollection.
     - ax: axis to draw
     - N: number of grid (N>2)
     - x0, x1: x-axis limits
     - y0, y1: y-axis limits
     """
     assert N > 2, "N should be greater than 2"
-    x = np.linspace(x0, x1, N + 1)
-    x_c = x[1:-1]
-    y = np.linspace(y0, y1, N + 1)
-    y_c = y[1:-1]
-    #
-    for i in range(N - 1):
-        line = mlines.Line2D(
-            [x_c[i], x_c[i]],
-            [y0, y1],
-            color="k",
-            transform=ax.transAxes,
-            **kwargs,
-        )
-        ax.add_line(line)
-        #
-        line = mlines.Line2D(
-            [x0, x1],
-            [y_c[i], y_c[i]],
-            color="k",
-            transform=ax.transAxes,
-            **kwargs,
-        )
-        ax.add_line(line)
+    x_c = np.linspace(x0, x1, N + 1)[1:-1]
+    y_c = np.linspace(y0, y1, N + 1)[1:-1]
+    # (2(N-1), 2, 2) segments: vertical lines, then horizontal lines
+    vertical = np.stack(
+        (
+            np.column_stack((x_c, np.full(N - 1, y0))),
+            np.column_stack((x_c, np.full(N - 1, y1))),
+        ),
+        axis=1,
+    )
+    horizontal = np.stack(
+        (
+            np.column_stack((np.full(N - 1, x0), y_c)),
+            np.column_stack((np.full(N - 1, x1), y_c)),
+        ),
+        axis=1,
+    )
+    color = kwargs.pop("color", "k")
+    lines = mcollections.LineCollection(
+        np.concatenate((vertical, horizontal)),
+        colors=color,
+        transform=ax.transAxes,
+        **kwargs,
+    )
+    ax.add_collection(lines, autolim=False)
     return ax
 
 
+def draw_markers(
+    ax: Axes,
+    x: np.ndarray,
+    y: np.ndarray,
+    marker: str = "o",
+    s: Union[float, np.ndarray] = 20,
+    transform=None,
+    **kwargs,
+) -> mcollections.PathCollection:
+    """
+    Draw markers at (x, y) as a single PathCollection, without the colormap and
+    autoscaling work of ax.scatter.
+    - s: marker size (points^2), one value or one per marker
+    - transform: coordinates of (x, y), default: data coordinates
+    - kwargs: color, facecolors, edgecolors, linewidths, alpha, ...,
+        array + cmap (+ norm) to color markers by value
+    """
+    style = mmarkers.MarkerStyle(marker)
+    path = style.get_path().transformed(style.get_transform())
+    if not style.is_filled():  # line markers such as "x" and "+"
+        kwargs.setdefault("facecolors", "none")
+        kwargs.setdefault("linewidths", 1.5)
+    markers = mcollections.PathCollection(
+        [path],
+        sizes=np.atleast_1d(s),
+        offsets=np.column_stack((np.ravel(x), np.ravel(y))),
+        offset_transform=transform if transform is not None else ax.transData,
+        **kwargs,
+    )
+    markers.set_transform(mtransforms.IdentityTransform())  # sizes are in points
+    ax.add_collection(markers, autolim=False)
+    return markers
+
+
 def add_title(
-    ax: plt.Axes, text: str, REL_X: float = -0.24, REL_Y: float = 0.96, **kwargs
+    ax: Axes, text: str, REL_X: float = -0.24, REL_Y: float = 0.96, **kwargs
 ) -> None:
     """
     Add a title to the current axis.
@@ -59,7 +98,10 @@ def add_title(
 
 
 if __name__ == "__main__":
+    import matplotlib.pyplot as plt
+
     fig, ax = plt.subplots()
     draw_grid(ax, 5, 0, 1, 0, 1)
+    draw_markers(ax, [0.3, 0.5, 0.7], [0.5, 0.5, 0.5], marker="x", s=50, color="r")
     add_title(ax, "Grid", fontsize=16, color="blue")
     plt.show()
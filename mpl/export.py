@@ -0,0 +1,127 @@
+# <<< Batch export of many figures: Agg rendering in a process pool, and a hash of each
+# figure's inputs so unchanged figures are not rendered again. >>>
+import hashlib
+import json
+import os
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, List, NamedTuple, Sequence, Union
+
+
+class FigureSpec(NamedTuple):
+    """
+    One figure to export
+    - plot_func: plot_func(fig, **data) draws into a matplotlib Figure, must be a
+        module-level function so that it can be sent to worker processes
+    - fileName: output file, the format follows the extension
+    - data: keyword arguments of plot_func (arrays, numbers, strings, lists, dicts),
+        None: no arguments
+    - figsize, dpi, savefig_kwargs: passed to Figure / savefig
+    """
+
+    plot_func: Callable
+    fileName: str
+    data: Union[dict, None] = None
+    figsize: Union[tuple, None] = None
+    dpi: int = 200
+    savefig_kwargs: Union[dict, None] = None
+
+
+def _update_hash(h, obj):
+    if isinstance(obj, np.ndarray):
+        h.update("ndarray{}{}".format(obj.dtype.str, obj.shape).encode())
+        h.update(np.ascontiguousarray(obj).tobytes())
+    elif isinstance(obj, dict):
+        h.update(b"dict")
+        for key in sorted(obj, key=str):
+            _update_hash(h, str(key))
+            _update_hash(h, obj[key])
+    elif isinstance(obj, (list, tuple)):
+        h.update("{}{:d}".format(type(obj).__name__, len(obj)).encode())
+        for item in obj:
+            _update_hash(h, item)
+    elif obj is None or isinstance(obj, (bool, int, float, complex, str, np.generic)):
+        h.update("{}:{!r}".format(type(obj).__name__, obj).encode())
+    elif callable(obj):
+        h.update("{}.{}".format(obj.__module__, obj.__qualname__).encode())
+    else:
+        raise TypeError("cannot hash {}".format(type(obj).__name__))
+
+
+def spec_hash(spec: FigureSpec) -> str:
+    """hash of everything that decides how the figure looks (not of plot_func's code)"""
+    h = hashlib.sha1()
+    _update_hash(
+        h,
+        [spec.plot_func, spec.data or {}, spec.figsize, spec.dpi, spec.savefig_kwargs],
+    )
+    return h.hexdigest()
+
+
+def render_figure(spec: FigureSpec) -> str:
+    """Render one spec with the Agg canvas (no pyplot, no GUI), return its fileName"""
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+    fig = Figure(figsize=spec.figsize)
+    FigureCanvasAgg(fig)
+    spec.plot_func(fig, **(spec.data or {}))
+    savefig_kwargs = dict(bbox_inches="tight")
+    savefig_kwargs.update(spec.savefig_kwargs or {})
+    fig.savefig(spec.fileName, dpi=spec.dpi, **savefig_kwargs)
+    return spec.fileName
+
+
+def _load_cache(cacheName: str) -> Dict[str, str]:
+    if cacheName is None or not os.path.exists(cacheName):
+        return {}
+    with open(cacheName) as f:
+        return json.load(f)
+
+
+def _save_cache(cacheName: str, cache: Dict[str, str]):
+    tmpName = cacheName + ".tmp"
+    with open(tmpName, "w") as f:
+        json.dump(cache, f, indent=1, sort_keys=True)
+    os.replace(tmpName, cacheName)
+
+
+def export_figures(
+    specs: Sequence[FigureSpec],
+    processes: Union[int, None] = None,
+    cacheName: Union[str, None] = "figures.hash.json",
+    force: bool = False,
+    chunk_size: int = 8,
+) -> List[str]:
+    """
+    Render and save many figures
+    - processes: None: render in this process, else: number of worker processes
+    - cacheName: json file of {fileName: spec_hash} from the last run, a figure whose
+        file exists and whose hash is unchanged is skipped, None: no cache
+    - force: render everything
+    - Return: the files that were rendered
+    """
+    cache = _load_cache(cacheName)
+    hashes = {spec.fileName: spec_hash(spec) for spec in specs}
+    todo = [
+        spec
+        for spec in specs
+        if force
+        or cache.get(spec.fileName) != hashes[spec.fileName]
+        or not os.path.exists(spec.fileName)
+    ]
+    done = []
+    try:
+        if processes is None:
+            for spec in todo:
+                done.append(render_figure(spec))
+        else:
+            with ProcessPoolExecutor(max_workers=processes) as executor:
+                for fileName in executor.map(render_figure, todo, chunksize=chunk_size):
+                    done.append(fileName)
+    finally:
+        # record what was rendered, also when a figure failed halfway
+        if cacheName is not None:
+            cache.update({fileName: hashes[fileName] for fileName in done})
+            _save_cache(cacheName, cache)
+    return done
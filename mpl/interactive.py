@@ -1,136 +1,326 @@
-import matplotlib.pyplot as plt
-from typing import Callable
+from typing import Callable, Sequence, Tuple, Union
+import threading
 import time
 import numpy as np
-from scipy.optimize import minimize
 from collections import deque
 
 
+class RingBuffer:
+    """
+    Last `length` rows of a stream in a preallocated array, safe to share between
+    one writing and one reading thread
+    """
+
+    def __init__(self, length: int, width: int = 1, dtype=np.float64):
+        self._data = np.zeros((length, width), dtype=dtype)
+        self._head = 0  # next row to write
+        self._count = 0  # total rows appended
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return min(self._count, len(self._data))
+
+    @property
+    def count(self) -> int:
+        return self._count
+
+    def append(self, row):
+        with self._lock:
+            self._data[self._head] = row
+            self._head = (self._head + 1) % len(self._data)
+            self._count += 1
+
+    def extend(self, rows: np.ndarray):
+        """append a (n, width) block, only the last `length` rows are kept"""
+        rows = np.asarray(rows).reshape(-1, self._data.shape[1])
+        length = len(self._data)
+        with self._lock:
+            n = len(rows)
+            self._count += n
+            if n >= length:
+                self._data[:] = rows[-length:]
+                self._head = 0
+                return
+            first = min(n, length - self._head)
+            self._data[self._head : self._head + first] = rows[:first]
+            self._data[: n - first] = rows[first:]
+            self._head = (self._head + n) % length
+
+    def values(self) -> np.ndarray:
+        """copy of the stored rows, oldest first, (len, width)"""
+        with self._lock:
+            if self._count < len(self._data):
+                return self._data[: self._head].copy()
+            return np.roll(self._data, -self._head, axis=0)
+
+
 class MplInteractive:
-    def __init__(self, callback_func: Callable, HIST_LENGTH: int = 50):
-        self.datas = deque(maxlen=HIST_LENGTH)
+    """
+    Live plot of callback_func() against the sample index
+    - callback_func: returns one value, or one value per trace
+    - HIST_LENGTH: number of samples shown
+    - n_traces: number of values returned by callback_func
+    - layout: subplot index of each trace, default: all traces in one subplot
+    - fps: target frame rate of the plot, acquisition is not throttled by it
+    - interval: pause between two samples (seconds) in the acquisition thread
+    - blocks: callback_func returns a (n, n_traces) block of new samples per call
+        (n may be 0), e.g. CsvTail.read, see tptb.io.tail.plot_tail
+    callback_func runs on its own thread into a ring buffer, the plot is redrawn with
+    blitting (only the lines) and rescaled only when the data in the buffer leaves the
+    current limits, or fills less than half of them (e.g. once an outlier is gone).
+    """
+
+    def __init__(
+        self,
+        callback_func: Callable,
+        HIST_LENGTH: int = 50,
+        n_traces: int = 1,
+        layout: Union[Sequence[int], None] = None,
+        fps: float = 30.0,
+        interval: float = 0.0,
+        blocks: bool = False,
+    ):
         self.callback_func = callback_func
+        self.HIST_LENGTH = HIST_LENGTH
+        self.n_traces = n_traces
+        self.layout = list(layout) if layout is not None else [0] * n_traces
+        assert len(self.layout) == n_traces, "layout should have n_traces entries"
+        self.fps = fps
+        self.interval = interval
+        self.blocks = blocks
+        self.buffer = RingBuffer(HIST_LENGTH, n_traces)
+        self._stop = threading.Event()
+        self._error = None
+        self._background = None
+
+    @property
+    def datas(self) -> np.ndarray:
+        """samples in the plot, (len,) for a single trace else (len, n_traces)"""
+        values = self.buffer.values()
+        return values[:, 0] if self.n_traces == 1 else values
 
     def init_plot(self):
-        self.fig, self.axs = plt.subplots()
-        self.axs.set_xlabel("x")
-        self.axs.set_ylabel("y")
-        (self.plot1,) = self.axs.plot([], [])
+        import matplotlib.pyplot as plt
+
+        n_axes = max(self.layout) + 1
+        self.fig, axs = plt.subplots(nrows=n_axes, sharex=True, squeeze=False)
+        self.axs_list = list(axs[:, 0])
+        self.axs = self.axs_list[0] if n_axes == 1 else self.axs_list
+        for ax in self.axs_list:
+            ax.set_ylabel("y")
+            ax.set_xlim(0, self.HIST_LENGTH - 1)
+        self.axs_list[-1].set_xlabel("x")
+        self.lines = [
+            self.axs_list[i].plot([], [], animated=True)[0] for i in self.layout
+        ]
+        self.plot1 = self.lines[0]
+        self.fig.canvas.mpl_connect("draw_event", self._on_draw)
+
+    def _on_draw(self, event):
+        """full redraw (first show, resize, rescale): grab the new background"""
+        canvas = self.fig.canvas
+        if getattr(canvas, "supports_blit", False):
+            self._background = canvas.copy_from_bbox(self.fig.bbox)
+        for line in self.lines:
+            line.axes.draw_artist(line)
+
+    def _acquire(self):
+        try:
+            while not self._stop.is_set():
+                if self.blocks:
+                    self.buffer.extend(self.callback_func())
+                else:
+                    self.buffer.append(self.callback_func())
+                if self.interval > 0:
+                    time.sleep(self.interval)
+        except Exception as e:
+            self._error = e
+            self._stop.set()
+
+    def _rescale(self, values: np.ndarray) -> bool:
+        """
+        Fit the y limits of a subplot to its data when the data left them or spans less
+        than half of them (hysteresis, so small changes keep the blitted background),
+        True if any changed
+        """
+        changed = False
+        for i, ax in enumerate(self.axs_list):
+            y = values[:, [j for j, k in enumerate(self.layout) if k == i]]
+            y = y[np.isfinite(y)]
+            if len(y) == 0:
+                continue
+            y0, y1 = ax.get_ylim()
+            ymin, ymax = np.min(y), np.max(y)
+            margin = 0.1 * (ymax - ymin) if ymax > ymin else 0.5
+            lo, hi = ymin - margin, ymax + margin
+            if ymin < y0 or ymax > y1 or hi - lo < 0.5 * (y1 - y0):
+                ax.set_ylim(lo, hi)
+                changed = True
+        return changed
+
+    def _render(self):
+        values = self.buffer.values()
+        x = np.arange(len(values))
+        for j, line in enumerate(self.lines):
+            line.set_data(x, values[:, j])
+        canvas = self.fig.canvas
+        if self._rescale(values) or self._background is None:
+            canvas.draw()  # the draw_event grabs the background and draws the lines
+        else:
+            canvas.restore_region(self._background)
+            for line in self.lines:
+                line.axes.draw_artist(line)
+            canvas.blit(self.fig.bbox)
+        canvas.flush_events()
+
+    def start_session(self, duration: Union[float, None] = None):
+        """
+        Plot until the figure is closed, an error occurs, or after duration seconds
+        """
+        import matplotlib.pyplot as plt
 
-    def start_session(self):
         plt.ion()
         self.init_plot()
+        plt.show(block=False)
+        self._stop.clear()
+        self._error = None
+        thread = threading.Thread(target=self._acquire, daemon=True)
+        thread.start()
+        t0 = time.monotonic()
         try:
-            while True:
-                data = self.callback_func()
-                self.datas.append(data)
-                #
-                self.plot1.set_data(range(len(self.datas)), self.datas)
-                #
-                self.axs.relim()
-                self.axs.autoscale_view()
-                self.fig.canvas.flush_events()
-                #
-                time.sleep(0.05)
+            while not self._stop.is_set() and plt.fignum_exists(self.fig.number):
+                t_frame = time.monotonic()
+                self._render()
+                if duration is not None and t_frame - t0 > duration:
+                    break
+                time.sleep(max(1 / self.fps - (time.monotonic() - t_frame), 0))
+            if self._error is not None:
+                raise self._error
         except Exception as e:
             print(e)
         finally:
+            self._stop.set()
+            thread.join()
             plt.ioff()
 
 
+def plot_alignment_2d(fig, xs: np.ndarray, ys: np.ndarray, es: np.ndarray, best):
+    """
+    Transmission es measured at positions (xs, ys) and the best position, into fig
+    - usable with tptb.mpl.export.FigureSpec for batch export
+    """
+    from tptb.mpl.demo import draw_markers
+
+    ax = fig.add_subplot()
+    points = ax.scatter(
+        ys, xs, c=es, cmap="jet", vmin=0, vmax=np.max(es), label="Scan on 2D grid"
+    )
+    xbst, ybst = best
+    draw_markers(ax, [ybst], [xbst], marker="x", s=50, color="black", label="Bst point")
+    ax.set(xlim=(-10, 10), ylim=(-10, 10), xlabel="y(um)", ylabel="x(um)")
+    ax.legend()
+    fig.colorbar(points, ax=ax)
+
+
 def plot_ion_position_transmission(
-    uuid: str, callback_func: Callable, HIST_LENGTH: int = 1000, optimize=False
+    uuid: str,
+    callback_func: Callable,
+    HIST_LENGTH: int = 1000,
+    optimize=False,
+    strategy: Union[str, Callable, None] = None,
+    bounds: Union[Sequence[Tuple[float, float]], None] = None,
+    max_steps: Union[int, None] = None,
+    max_time: Union[float, None] = None,
+    tol: float = 1e-3,
+    plot_interval: float = 0.2,
+    **strategy_kwargs,
 ):
+    """
+    Align by maximizing the transmission T of callback_func(paras) -> (x, y, T)
+    - optimize: default strategy, True: "powell", False: "grid" (11x11 snake scan)
+    - strategy: a name in tptb.data.search.SEARCH_STRATEGIES ("grid",
+        "coarse_to_fine", "gp", "powell") or a custom strategy function
+    - bounds: search range of (x, y) in um, default: +-10 for "powell", else +-5
+    - max_steps, max_time (seconds): budget of new measurements
+    - tol: points closer than tol (um) are measured once
+    - plot_interval: redraw the live plot at most this often (seconds)
+    - strategy_kwargs: passed to the strategy, e.g. n=5, levels=3 for "coarse_to_fine"
+    """
+    import matplotlib.pyplot as plt
+    from tptb.data.search import MeasurementCache, run_search
+
+    if strategy is None:
+        strategy = "powell" if optimize else "grid"
+    if bounds is None:
+        bounds = [(-10, 10), (-10, 10)] if strategy == "powell" else [(-5, 5), (-5, 5)]
     datas = deque(maxlen=HIST_LENGTH)  # [(x1,y1,T1), (x2,y2,T2), ...)]
     # >>> plot data <<<
     plt.ion()
     fig, axs = plt.subplots(nrows=1, ncols=2, figsize=(10, 5))
-    # axs[0].set_xlabel("x(um)")
-    # axs[0].set_ylabel("y(um)")
     axs[0].set(xlim=(-10, 10), ylim=(-10, 10), xlabel="y(um)", ylabel="x(um)")
     axs[1].set_xlabel("time")
     axs[1].set_ylabel("transmission")
-    # ax.set_ylim(0, 1)
     fig_new_pt = axs[0].scatter([], [], marker="x", c="black", s=50)
     fig_position = axs[0].scatter([], [], c=np.array([]), cmap="jet", vmin=0, vmax=1)
     (fig_transmission,) = axs[1].plot([], [])
-    # print(aaa)
-    # >>> update data <<<
-
-    def _optimize_wrapper(datas, callback_func, paras):
-        # >>> update plot <<<
-        if len(datas) > 0:
-            xs, ys, es = zip(*datas)
-            fig_position.set_offsets(np.column_stack((ys, xs)))
-            fig_position.set_array(es)
-            fig_position.set_alpha(
-                np.linspace(0.2, 0.4, len(xs))
-            )  # alpha increase with time
-            #
-            fig_transmission.set_data(range(len(es)), es)
-            axs[1].relim()
-            axs[1].autoscale_view()
-        # highlight the new point
-        fig_new_pt.set_offsets(np.column_stack((paras[1], paras[0])))
-        x, y, T = callback_func(paras)
-        # >>> update data <<<
-        datas.append((x, y, T))
+    last_plot = [-np.inf]
+
+    def _update_plot(force: bool = False):
+        now = time.monotonic()
+        if len(datas) == 0 or (not force and now - last_plot[0] < plot_interval):
+            return
+        last_plot[0] = now
+        xs, ys, es = np.array(datas).T
+        fig_position.set_offsets(np.column_stack((ys, xs)))
+        fig_position.set_array(es)
+        fig_position.set_alpha(
+            np.linspace(0.2, 0.4, len(xs))
+        )  # alpha increase with time
+        fig_new_pt.set_offsets([[ys[-1], xs[-1]]])  # highlight the new point
         #
+        fig_transmission.set_data(range(len(es)), es)
+        axs[1].relim()
+        axs[1].autoscale_view()
+        fig.canvas.draw_idle()
         fig.canvas.flush_events()
-        #
-        return -T
 
-    #
+    def _on_measure(paras, res):
+        datas.append(tuple(res))
+        _update_plot()
+
+    # >>> search <<<
+    objective = MeasurementCache(
+        callback_func,
+        value=lambda res: res[2],
+        tol=tol,
+        max_steps=max_steps,
+        max_time=max_time,
+        on_measure=_on_measure,
+    )
+    paras = [0, 0]
     try:
-        if optimize:  # using scipy.optimize.minimize
-            paras = [0, 0]
-            paras = minimize(
-                lambda para: _optimize_wrapper(datas, callback_func, para),
-                x0=paras,
-                # method="Nelder-Mead",
-                method="Powell",
-                # method="L-BFGS-B",
-                bounds=[(-10, 10), (-10, 10)],
-                options={"disp": True, "maxiter": 80, "ftol": 1e-10},
+        result = run_search(strategy, objective, bounds, **strategy_kwargs)
+        if result is None:
+            print("nothing measured, the budget (max_steps / max_time) is used up")
+            return
+        paras, max_T = result
+        _update_plot(force=True)
+        print(
+            "{:d} measurements, {:d} cache hits, best T={:.4f}".format(
+                len(objective.history), objective.hits, max_T
             )
-            paras = paras.x
-        else:  # 2D scanning
-            X = np.linspace(-5, 5, 11)
-            Y = np.linspace(-5, 5, 11)
-            # snake scan
-            max_T = 0
-            bstPara = [0, 0]
-            for i in range(len(X)):
-                x = X[i]
-                Yx = Y if i % 2 == 0 else Y[::-1]
-                for y in Yx:
-                    paras = [x, y]
-                    minus_T = _optimize_wrapper(datas, callback_func, paras)
-                    if minus_T < max_T:
-                        max_T = minus_T
-                        bstPara = paras
-            paras = bstPara
-            callback_func(paras)
+        )
+        callback_func(paras)
         #
         plt.ioff()
         # >>> plot datas <<<
-        plt.figure()
-        xs, ys, es = zip(*datas)
-        plt.scatter(
-            ys, xs, c=es, cmap="jet", vmin=0, vmax=np.max(es), label="Scan on 2D grid"
-        )
-        xbst, ybst = paras
-        plt.scatter(ybst, xbst, marker="x", c="black", s=50, label="Bst point")  # type: ignore
-        plt.xlim(-10, 10)
-        plt.ylim(-10, 10)
-        plt.xlabel("y(um)")
-        plt.ylabel("x(um)")
-        plt.legend()
-        plt.colorbar()
+        fig_2d = plt.figure()
+        xs, ys, es = np.array(datas).T
+        plot_alignment_2d(fig_2d, xs, ys, es, paras)
         dataName = getDataName(uuid)
         fileName = dataName + "_2D_align.png"
         print(fileName)
-        plt.savefig(fileName, dpi=200, bbox_inches="tight")
+        fig_2d.savefig(fileName, dpi=200, bbox_inches="tight")
         plt.show()
 
     except Exception as e:
@@ -1,4 +1,3 @@
-import matplotlib.pyplot as plt
 import numpy as np
 from typing import Union
 
@@ -7,7 +6,9 @@ def mpl_default_colors() -> list:
     """
     Return the default colors of matplotlib.
     """
-    return plt.rcParams["axes.prop_cycle"].by_key()["color"]
+    from matplotlib import rcParams
+
+    return rcParams["axes.prop_cycle"].by_key()["color"]
 
 
 def circle_mask(
@@ -15,7 +16,7 @@ def circle_mask(
     R: Union[int, float, None] = None,
     xc: Union[int, float] = 0,
     yc: Union[int, float] = 0,
-    dtype: type = np.float_,
+    dtype: type = np.float64,
 ) -> np.ndarray:
     """
     Create a N*N circular mask.
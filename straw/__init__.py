@@ -0,0 +1,61 @@
+"""
+utils for strawberry fields, submodules are imported on first use
+- partial_trace, fidelity, state_from_str and straw2qt are both submodules and functions,
+    tptb.straw.<name> is the submodule, import the function from it
+"""
+
+from tptb._lazy import lazy_attributes
+
+__getattr__, __dir__ = lazy_attributes(
+    __name__,
+    {
+        "blockwise": [
+            "BLOCK_BYTES",
+            "postselect_dm_blocked",
+            "trace_blocked",
+            "renormalize_blocked",
+            "straw2qt_blocked",
+            "qt2straw_blocked",
+        ],
+        "fidelity": ["expectation", "overlap", "fidelity_ket"],
+        "partial_trace": [
+            "reorder_modes",
+            "reduced_dm",
+            "photon_number_distribution",
+            "partial_trace_ket",
+        ],
+        "postselect": [
+            "postselect_mask",
+            "postselect_indices",
+            "postselect_ket",
+            "postselect_dm",
+            "postselect_ket_compact",
+            "postselect_dm_compact",
+            "embed_ket",
+            "embed_dm",
+            "postselect_batch",
+        ],
+        "postselect_func": [
+            "RULE_QUBIT_2_2",
+            "RULE_NPHOTON_GE2",
+            "RULE_PBSCNOT",
+            "postselect_qubit_2_2_ket",
+            "postselect_qubit_2_2_dm",
+            "postselect_nphoton_ge2_dm",
+            "postselect_PBSCNOT_dm",
+        ],
+        "postselect_rule": ["Expr", "Rule", "mode", "herald", "total", "vacuum"],
+        "state_from_str": [
+            "SparseKet",
+            "qubit_state_from_str",
+            "fock_state_from_str",
+            "bell_state",
+        ],
+        "straw2qt": [
+            "straw2qt_tensor",
+            "qt2straw",
+            "ket_tensor2kron",
+            "ket_kron2tensor",
+        ],
+    },
+)
@@ -0,0 +1,169 @@
+# <<< Out-of-core versions of the straw operations, for np.memmap-backed density matrices. >>>
+# <<< Everything works on row blocks of bounded size, results go to `out`,
+# which may be an array, a np.memmap, or a .npy file name (opened as a memmap). >>>
+import numpy as np
+from itertools import product
+from typing import Callable, Iterator, Tuple, Union
+from tptb.straw.postselect import postselect_mask, _infer_n_modes
+
+# default size of one block in bytes
+BLOCK_BYTES = 2**28
+
+
+def _block_rows(state: np.ndarray, block_rows: Union[int, None]) -> int:
+    if block_rows is not None:
+        return block_rows
+    row_bytes = state.dtype.itemsize * int(np.prod(state.shape[1:]))
+    return max(1, BLOCK_BYTES // row_bytes)
+
+
+def _row_blocks(n_rows: int, block_rows: int) -> Iterator[slice]:
+    for start in range(0, n_rows, block_rows):
+        yield slice(start, min(start + block_rows, n_rows))
+
+
+def _open_out(
+    out: Union[np.ndarray, str, None], shape: Tuple[int, ...], dtype
+) -> np.ndarray:
+    if out is None:
+        return np.empty(shape, dtype=dtype)
+    if isinstance(out, str):
+        return np.lib.format.open_memmap(out, mode="w+", dtype=dtype, shape=shape)
+    if out.shape != tuple(shape):
+        raise ValueError("out has shape {}, expected {}".format(out.shape, shape))
+    return out
+
+
+def _flush(out: np.ndarray) -> np.ndarray:
+    if isinstance(out, np.memmap):
+        out.flush()
+    return out
+
+
+def postselect_dm_blocked(
+    state_dm: np.ndarray,
+    rule: Callable,
+    cutoff_dim: int = 5,
+    n_modes: Union[int, None] = None,
+    out: Union[np.ndarray, str, None] = None,
+    block_rows: Union[int, None] = None,
+) -> np.ndarray:
+    """
+    postselect_dm, one row block at a time
+    - state_dm: (D, D) density matrix in QuTiP layout, may be a np.memmap
+    - out: None: in place, else array / memmap / .npy file name for the result
+    - block_rows: rows per block, default from BLOCK_BYTES
+    """
+    if n_modes is None:
+        n_modes = _infer_n_modes(state_dm.shape[-1], cutoff_dim)
+    mask = postselect_mask(rule, cutoff_dim, n_modes)
+    drop = np.flatnonzero(~mask)
+    out = state_dm if out is None else _open_out(out, state_dm.shape, state_dm.dtype)
+    for s in _row_blocks(state_dm.shape[0], _block_rows(state_dm, block_rows)):
+        block = out[s]
+        if out is not state_dm:
+            block[...] = state_dm[s]
+        block[~mask[s]] = 0
+        block[:, drop] = 0
+    return _flush(out)
+
+
+def trace_blocked(state_dm: np.ndarray) -> complex:
+    """Trace, only the diagonal is read"""
+    return np.trace(state_dm)
+
+
+def renormalize_blocked(
+    state_dm: np.ndarray,
+    out: Union[np.ndarray, str, None] = None,
+    block_rows: Union[int, None] = None,
+) -> Tuple[np.ndarray, float]:
+    """
+    Divide by the trace, one row block at a time
+    - out: None: in place, else array / memmap / .npy file name for the result
+    - Return: (state_dm / trace, trace)
+    """
+    trace = trace_blocked(state_dm).real
+    out = state_dm if out is None else _open_out(out, state_dm.shape, state_dm.dtype)
+    scale = np.asarray(trace, dtype=state_dm.real.dtype)
+    for s in _row_blocks(state_dm.shape[0], _block_rows(state_dm, block_rows)):
+        np.divide(state_dm[s], scale, out=out[s])
+    return _flush(out), trace
+
+
+def _prefix_modes(
+    cutoff_dim: int, N: int, itemsize: int, block_rows: Union[int, None]
+) -> int:
+    """number m of leading row modes fixed per block, a block has cutoff_dim**(N-m) rows"""
+    D = cutoff_dim**N
+    for m in range(N + 1):
+        rows = cutoff_dim ** (N - m)
+        if block_rows is not None:
+            if rows <= block_rows:
+                return m
+        elif rows * D * itemsize <= BLOCK_BYTES:
+            return m
+    return N
+
+
+def _straw_index(prefix: Tuple[int, ...], N: int) -> tuple:
+    """rho[p0, :, p1, :, ..., :, :] fixes the row index of the first len(prefix) modes"""
+    index = []
+    for p in prefix:
+        index += [p, slice(None)]
+    return tuple(index) + (slice(None),) * (2 * (N - len(prefix)))
+
+
+def straw2qt_blocked(
+    state_dm: np.ndarray,
+    cutoff_dim: int = 5,
+    N: int = 4,
+    out: Union[np.ndarray, str, None] = None,
+    block_rows: Union[int, None] = None,
+    dtype=None,
+) -> np.ndarray:
+    """
+    straw2qt, one block of QuTiP rows at a time
+    - state_dm: rho_{iijjkkll}, may be a np.memmap
+    - out: None: new array, else array / memmap / .npy file name for rho_{ijkl, ijkl}
+    - dtype: dtype of a new `out`, None keeps the input dtype
+    """
+    D = cutoff_dim**N
+    out = _open_out(out, (D, D), dtype or state_dm.dtype)
+    m = _prefix_modes(cutoff_dim, N, out.dtype.itemsize, block_rows)
+    rows = cutoff_dim ** (N - m)
+    # sub-block axes: cols of modes < m, then (row, col) of modes >= m
+    row_axes = [m + 2 * j for j in range(N - m)]
+    col_axes = list(range(m)) + [m + 2 * j + 1 for j in range(N - m)]
+    for i, prefix in enumerate(product(range(cutoff_dim), repeat=m)):
+        block = state_dm[_straw_index(prefix, N)].transpose(row_axes + col_axes)
+        out[i * rows : (i + 1) * rows] = block.reshape(rows, D)
+    return _flush(out)
+
+
+def qt2straw_blocked(
+    state_dm: np.ndarray,
+    cutoff_dim: int = 5,
+    N: int = 4,
+    out: Union[np.ndarray, str, None] = None,
+    block_rows: Union[int, None] = None,
+    dtype=None,
+) -> np.ndarray:
+    """
+    qt2straw, one block of QuTiP rows at a time
+    - state_dm: rho_{ijkl, ijkl}, may be a np.memmap
+    - out: None: new array, else array / memmap / .npy file name for rho_{iijjkkll}
+    - dtype: dtype of a new `out`, None keeps the input dtype
+    """
+    out = _open_out(out, (cutoff_dim,) * (2 * N), dtype or state_dm.dtype)
+    m = _prefix_modes(cutoff_dim, N, out.dtype.itemsize, block_rows)
+    rows = cutoff_dim ** (N - m)
+    # block axes: rows of modes >= m (0..N-m-1), then cols of all modes (N-m..2N-m-1)
+    axes = [N - m + k for k in range(m)]
+    for j in range(N - m):
+        axes += [j, N + j]
+    for i, prefix in enumerate(product(range(cutoff_dim), repeat=m)):
+        block = np.asarray(state_dm[i * rows : (i + 1) * rows])
+        block = block.reshape((cutoff_dim,) * (2 * N - m)).transpose(axes)
+        out[_straw_index(prefix, N)] = block
+    return _flush(out)
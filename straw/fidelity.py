@@ -0,0 +1,121 @@
+# <<< Fidelity / overlap against target states given as strings, e.g. "00+11". >>>
+# <<< Only the sparse support of the target ket is touched, |psi><psi| is never built. >>>
+import numpy as np
+from functools import lru_cache
+from typing import Sequence, Tuple, Union
+from tptb.straw.state_from_str import (
+    _mono_fock_state_from_str,
+    _mono_qubit_state_from_str,
+    state_from_str,
+)
+
+_MONO_FUNCS = {
+    "qubit": _mono_qubit_state_from_str,
+    "fock": _mono_fock_state_from_str,
+}
+
+
+@lru_cache(maxsize=None)
+def _target_support(
+    targets: Tuple[str, ...], cutoff_dims: int, kind: str
+) -> Tuple[np.ndarray, np.ndarray, int]:
+    """
+    Stack the sparse supports of several targets, padded with zero amplitudes
+    - Return: (idx, amp, D), idx and amp of shape (T, K)
+    """
+    if kind not in _MONO_FUNCS:
+        raise ValueError("kind must be qubit or fock")
+    sparse_kets = [
+        state_from_str(_MONO_FUNCS[kind], target, cutoff_dims, sparse=True)
+        for target in targets
+    ]
+    n_modes = sparse_kets[0].n_modes
+    if any(ket.n_modes != n_modes for ket in sparse_kets):
+        raise ValueError("all targets must have the same number of modes")
+    K = max(len(ket.indices) for ket in sparse_kets)
+    idx = np.zeros((len(targets), K), dtype=np.intp)
+    amp = np.zeros((len(targets), K))
+    for t, ket in enumerate(sparse_kets):
+        idx[t, : len(ket.indices)] = ket.indices
+        amp[t, : len(ket.indices)] = ket.amplitudes
+    idx.flags.writeable = False
+    amp.flags.writeable = False
+    return idx, amp, cutoff_dims**n_modes
+
+
+def _prepare(
+    targets: Union[str, Sequence[str]], cutoff_dims: int, kind: str, state: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray, bool]:
+    single = isinstance(targets, str)
+    if single:
+        targets = [targets]
+    idx, amp, D_target = _target_support(tuple(targets), cutoff_dims, kind)
+    D = state.shape[-1]
+    if D_target != D:
+        raise ValueError(
+            "targets live in dimension {:d}, state in {:d}".format(D_target, D)
+        )
+    # amplitudes in the real precision of the state, complex64 stays complex64
+    real_dtype = np.finfo(np.result_type(state.dtype, np.float32)).dtype
+    return idx, amp.astype(real_dtype, copy=False), single
+
+
+def expectation(
+    state_dm: np.ndarray,
+    targets: Union[str, Sequence[str]],
+    cutoff_dims: int,
+    kind: str = "qubit",
+) -> np.ndarray:
+    """
+    <psi|rho|psi> for every target psi
+    - state_dm: (..., D, D) density matrix in QuTiP layout, leading axes are batch axes
+    - targets: "00+11" or a list of target strings
+    - kind: "qubit" / "fock", how targets are parsed (see state_from_str)
+    - Return: (..., T) complex, or (...) for a single target string
+    """
+    idx, amp, single = _prepare(targets, cutoff_dims, kind, state_dm)
+    sub_dm = state_dm[..., idx[:, :, None], idx[:, None, :]]  # (..., T, K, K)
+    res = np.einsum("tk,...tkl,tl->...t", amp.conj(), sub_dm, amp)
+    return res[..., 0] if single else res
+
+
+def fidelity(
+    state_dm: np.ndarray,
+    targets: Union[str, Sequence[str]],
+    cutoff_dims: int,
+    kind: str = "qubit",
+) -> np.ndarray:
+    """
+    Fidelity <psi|rho|psi> with pure targets, a (B, T) table for a (B, D, D) stack
+    - see expectation
+    """
+    return expectation(state_dm, targets, cutoff_dims, kind).real
+
+
+def overlap(
+    state_ket: np.ndarray,
+    targets: Union[str, Sequence[str]],
+    cutoff_dims: int,
+    kind: str = "qubit",
+) -> np.ndarray:
+    """
+    <psi|phi> for every target psi
+    - state_ket: (..., D) ket in kron layout, leading axes are batch axes
+    - Return: (..., T) complex, or (...) for a single target string
+    """
+    idx, amp, single = _prepare(targets, cutoff_dims, kind, state_ket)
+    res = np.einsum("tk,...tk->...t", amp.conj(), state_ket[..., idx])
+    return res[..., 0] if single else res
+
+
+def fidelity_ket(
+    state_ket: np.ndarray,
+    targets: Union[str, Sequence[str]],
+    cutoff_dims: int,
+    kind: str = "qubit",
+) -> np.ndarray:
+    """
+    |<psi|phi>|^2 for every target psi
+    - see overlap
+    """
+    return np.abs(overlap(state_ket, targets, cutoff_dims, kind)) ** 2
@@ -0,0 +1,114 @@
+# <<< Partial trace, mode reordering and marginals on the native Strawberry Fields layout rho_{iijjkkll}. >>>
+# <<< Nothing here builds the flattened d**N x d**N matrix, leading axes are batch axes. >>>
+import numpy as np
+from typing import Sequence
+
+_EINSUM_MAX_LABELS = 52
+
+
+def _check_modes(modes: Sequence[int], N: int) -> list:
+    modes = [int(k) for k in modes]
+    if len(set(modes)) != len(modes):
+        raise ValueError("modes must be unique")
+    if any(k < 0 or k >= N for k in modes):
+        raise ValueError("modes must be in range(N)")
+    return modes
+
+
+def partial_trace(state_dm: np.ndarray, keep: Sequence[int], N: int = 4) -> np.ndarray:
+    """
+    Trace out every mode not in `keep`
+    - state_dm: (..., d, d, ..., d, d) rho_{iijjkkll} with 2N mode axes
+    - keep: modes to keep, the output follows this order
+    - Return: (..., d, d, ..., d, d) with 2*len(keep) mode axes
+    """
+    keep = _check_modes(keep, N)
+    traced = [k for k in range(N) if k not in keep]
+    if 2 * len(keep) + len(traced) <= _EINSUM_MAX_LABELS:
+        # one contraction, row/col of a traced mode share a label
+        raw_labels = []
+        for k in range(N):
+            raw_labels += [2 * k, 2 * k] if k in traced else [2 * k, 2 * k + 1]
+        in_labels = _relabel(raw_labels)
+        label_of = dict(zip(raw_labels, in_labels))
+        out_labels = []
+        for k in keep:
+            out_labels += [label_of[2 * k], label_of[2 * k + 1]]
+        return np.einsum(state_dm, [Ellipsis] + in_labels, [Ellipsis] + out_labels)
+    # too many modes for einsum labels: trace one mode at a time, last mode first
+    n_batch = state_dm.ndim - 2 * N
+    for k in sorted(traced, reverse=True):
+        state_dm = np.trace(state_dm, axis1=n_batch + 2 * k, axis2=n_batch + 2 * k + 1)
+    remaining = [k for k in range(N) if k not in traced]
+    return reorder_modes(state_dm, [remaining.index(k) for k in keep], len(keep))
+
+
+def _relabel(labels: Sequence[int]) -> list:
+    """map labels onto 0, 1, 2, ... so that they fit einsum's 52 labels"""
+    mapping = {}
+    for label in labels:
+        mapping.setdefault(label, len(mapping))
+    return [mapping[label] for label in labels]
+
+
+def reorder_modes(state_dm: np.ndarray, order: Sequence[int], N: int = 4) -> np.ndarray:
+    """
+    Permute the modes of rho_{iijjkkll} (zero-copy view)
+    - order: new mode k is old mode order[k]
+    """
+    order = _check_modes(order, N)
+    if len(order) != N:
+        raise ValueError("order must be a permutation of range(N)")
+    n_batch = state_dm.ndim - 2 * N
+    axes = list(range(n_batch))
+    for k in order:
+        axes += [n_batch + 2 * k, n_batch + 2 * k + 1]
+    return state_dm.transpose(axes)
+
+
+def reduced_dm(state_dm: np.ndarray, mode: int, N: int = 4) -> np.ndarray:
+    """
+    Single-mode marginal
+    - Return: (..., d, d)
+    """
+    return partial_trace(state_dm, [mode], N)
+
+
+def photon_number_distribution(
+    state_dm: np.ndarray, mode: int, N: int = 4
+) -> np.ndarray:
+    """
+    Photon number distribution P(n) of one mode
+    - Return: (..., d)
+    """
+    return np.diagonal(reduced_dm(state_dm, mode, N), axis1=-2, axis2=-1).real
+
+
+def partial_trace_ket(
+    state_ket: np.ndarray, keep: Sequence[int], N: int = 4
+) -> np.ndarray:
+    """
+    Reduced density matrix of a pure state, without forming |psi><psi|
+    - state_ket: (..., d, ..., d) ket in "tensor" layout with N mode axes
+    - keep: modes to keep, the output follows this order
+    - Return: (..., d, d, ..., d, d) rho_{iijjkkll} with 2*len(keep) mode axes
+    """
+    keep = _check_modes(keep, N)
+    if 2 * len(keep) + (N - len(keep)) > _EINSUM_MAX_LABELS:
+        raise ValueError("too many modes for partial_trace_ket")
+    # ket labels: mode k -> k; bra labels: kept mode k -> N + k, traced mode k -> k
+    ket_labels = list(range(N))
+    bra_labels = [N + k if k in keep else k for k in range(N)]
+    out_labels = []
+    for k in keep:
+        out_labels += [k, N + k]
+    labels = _relabel(ket_labels + bra_labels + out_labels)
+    ket_labels, bra_labels, out_labels = labels[:N], labels[N : 2 * N], labels[2 * N :]
+    return np.einsum(
+        state_ket,
+        [Ellipsis] + ket_labels,
+        state_ket.conj(),
+        [Ellipsis] + bra_labels,
+        [Ellipsis] + out_labels,
+        optimize=True,
+    )
@@ -0,0 +1,215 @@
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from typing import Callable, Tuple, Union
+
+
+def _infer_n_modes(D: int, cutoff_dim: int) -> int:
+    """
+    - D: dimension of the flattened Hilbert space (cutoff_dim**n_modes)
+    - Return: n_modes
+    """
+    n_modes = int(round(np.log(D) / np.log(cutoff_dim)))
+    if cutoff_dim**n_modes != D:
+        raise ValueError(
+            "dimension {:d} is not a power of cutoff_dim {:d}".format(D, cutoff_dim)
+        )
+    return n_modes
+
+
+def _inexact(dtype) -> np.dtype:
+    """dtype itself if it is floating / complex, else float64 (for renormalizing)"""
+    dtype = np.dtype(dtype)
+    return dtype if np.issubdtype(dtype, np.inexact) else np.dtype(np.float64)
+
+
+@lru_cache(maxsize=None)
+def postselect_mask(rule: Callable, cutoff_dim: int, n_modes: int) -> np.ndarray:
+    """
+    Flat boolean mask of the basis states kept by `rule`, cached per (rule, cutoff_dim, n_modes)
+    - rule: rule(n) -> bool array, n[k] is the photon number of mode k,
+        broadcastable over the (cutoff_dim,)*n_modes grid; True means keep
+    - Return: read-only bool array of length cutoff_dim**n_modes, ordered as the kron layout
+    """
+    shape = (cutoff_dim,) * n_modes
+    n = np.indices(shape, sparse=True)
+    mask = np.broadcast_to(np.asarray(rule(n), dtype=bool), shape).reshape(-1)
+    mask.flags.writeable = False
+    return mask
+
+
+@lru_cache(maxsize=None)
+def postselect_indices(rule: Callable, cutoff_dim: int, n_modes: int) -> np.ndarray:
+    """
+    Flat indices of the basis states kept by `rule`, cached per (rule, cutoff_dim, n_modes)
+    """
+    idx = np.flatnonzero(postselect_mask(rule, cutoff_dim, n_modes))
+    idx.flags.writeable = False
+    return idx
+
+
+@lru_cache(maxsize=None)
+def _drop_indices(rule: Callable, cutoff_dim: int, n_modes: int) -> np.ndarray:
+    idx = np.flatnonzero(~postselect_mask(rule, cutoff_dim, n_modes))
+    idx.flags.writeable = False
+    return idx
+
+
+def postselect_ket(
+    state_ket: np.ndarray,
+    rule: Callable,
+    cutoff_dim: int = 5,
+    n_modes: Union[int, None] = None,
+) -> np.ndarray:
+    """
+    Zero every amplitude of `state_ket` rejected by `rule` (in place)
+    - state_ket: (D,) ket in kron layout, or (..., D) stack of kets
+    - rule: rule(n) -> bool array, True means keep
+    - n_modes: inferred from D if None
+    """
+    if n_modes is None:
+        n_modes = _infer_n_modes(state_ket.shape[-1], cutoff_dim)
+    drop = _drop_indices(rule, cutoff_dim, n_modes)
+    state_ket[..., drop] = 0
+    return state_ket
+
+
+def postselect_dm(
+    state_dm: np.ndarray,
+    rule: Callable,
+    cutoff_dim: int = 5,
+    n_modes: Union[int, None] = None,
+) -> np.ndarray:
+    """
+    Zero every row and column of `state_dm` rejected by `rule` (in place)
+    - state_dm: (D, D) density matrix in QuTiP layout rho_{ijkl, ijkl}, or (..., D, D) stack
+    - rule: rule(n) -> bool array, True means keep
+    - n_modes: inferred from D if None
+    """
+    if n_modes is None:
+        n_modes = _infer_n_modes(state_dm.shape[-1], cutoff_dim)
+    drop = _drop_indices(rule, cutoff_dim, n_modes)
+    state_dm[..., drop, :] = 0
+    state_dm[..., drop] = 0
+    return state_dm
+
+
+def postselect_ket_compact(
+    state_ket: np.ndarray,
+    rule: Callable,
+    cutoff_dim: int = 5,
+    n_modes: Union[int, None] = None,
+    dtype=None,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Keep only the amplitudes accepted by `rule`, without touching `state_ket`
+    - state_ket: (..., D) ket in kron layout
+    - dtype: dtype of sub_ket, None keeps the input dtype (float64 for integer input)
+    - Return: (sub_ket, idx, prob)
+        - sub_ket: (..., K) renormalized ket on the kept subspace
+        - idx: (K,) flat indices of the kept basis states, see embed_ket
+        - prob: success probability of the postselection
+    """
+    if n_modes is None:
+        n_modes = _infer_n_modes(state_ket.shape[-1], cutoff_dim)
+    idx = postselect_indices(rule, cutoff_dim, n_modes)
+    sub_ket = state_ket[..., idx].astype(dtype or _inexact(state_ket.dtype), copy=False)
+    norm_sub = np.sum(np.abs(sub_ket) ** 2, axis=-1)
+    norm = np.sum(np.abs(state_ket) ** 2, axis=-1)
+    # a zero state has probability 0 and stays zero
+    prob = norm_sub / np.where(norm > 0, norm, 1)
+    sub_ket /= np.sqrt(np.where(norm_sub > 0, norm_sub, 1))[..., None]
+    return sub_ket, idx, prob
+
+
+def postselect_dm_compact(
+    state_dm: np.ndarray,
+    rule: Callable,
+    cutoff_dim: int = 5,
+    n_modes: Union[int, None] = None,
+    dtype=None,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Keep only the rows and columns accepted by `rule`, without touching `state_dm`
+    - state_dm: (..., D, D) density matrix in QuTiP layout
+    - dtype: dtype of sub_dm, None keeps the input dtype (float64 for integer input)
+    - Return: (sub_dm, idx, prob)
+        - sub_dm: (..., K, K) unit-trace density matrix on the kept subspace
+        - idx: (K,) flat indices of the kept basis states, see embed_dm
+        - prob: success probability of the postselection
+    """
+    if n_modes is None:
+        n_modes = _infer_n_modes(state_dm.shape[-1], cutoff_dim)
+    idx = postselect_indices(rule, cutoff_dim, n_modes)
+    sub_dm = state_dm[..., idx[:, None], idx].astype(
+        dtype or _inexact(state_dm.dtype), copy=False
+    )
+    trace_sub = np.trace(sub_dm, axis1=-2, axis2=-1).real
+    trace = np.trace(state_dm, axis1=-2, axis2=-1).real
+    # a zero state has probability 0 and stays zero
+    prob = trace_sub / np.where(trace > 0, trace, 1)
+    sub_dm /= np.where(trace_sub > 0, trace_sub, 1)[..., None, None]
+    return sub_dm, idx, prob
+
+
+def embed_ket(sub_ket: np.ndarray, idx: np.ndarray, D: int) -> np.ndarray:
+    """
+    Inverse of postselect_ket_compact, put `sub_ket` back into the full space
+    - sub_ket: (..., K)
+    - idx: (K,) flat indices returned by postselect_ket_compact
+    - D: dimension of the full space, cutoff_dim**n_modes
+    """
+    state_ket = np.zeros(sub_ket.shape[:-1] + (D,), dtype=sub_ket.dtype)
+    state_ket[..., idx] = sub_ket
+    return state_ket
+
+
+def embed_dm(sub_dm: np.ndarray, idx: np.ndarray, D: int) -> np.ndarray:
+    """
+    Inverse of postselect_dm_compact, put `sub_dm` back into the full space
+    - sub_dm: (..., K, K)
+    - idx: (K,) flat indices returned by postselect_dm_compact
+    - D: dimension of the full space, cutoff_dim**n_modes
+    """
+    state_dm = np.zeros(sub_dm.shape[:-2] + (D, D), dtype=sub_dm.dtype)
+    state_dm[..., idx[:, None], idx] = sub_dm
+    return state_dm
+
+
+def postselect_batch(
+    states: np.ndarray,
+    rule: Callable,
+    cutoff_dim: int = 5,
+    n_modes: Union[int, None] = None,
+    dm: bool = True,
+    processes: Union[int, None] = None,
+    chunk_size: int = 64,
+) -> np.ndarray:
+    """
+    Postselect a stack of states (in place)
+    - states: (B, D, D) density matrices or (B, D) kets, may be a np.memmap
+    - dm: states are density matrices (True) or kets (False)
+    - processes: None: one vectorized pass over the whole stack,
+        else: number of worker processes, each handling `chunk_size` states at a time
+    - rule must be picklable when processes is set (module-level function or Rule)
+    """
+    func = postselect_dm if dm else postselect_ket
+    if n_modes is None:
+        n_modes = _infer_n_modes(states.shape[-1], cutoff_dim)
+    if processes is None:
+        return func(states, rule, cutoff_dim, n_modes)
+    #
+    B = states.shape[0]
+    starts = range(0, B, chunk_size)
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        # keep at most 2 chunks per worker in flight, so memory stays bounded
+        pending = {}
+        for start in starts:
+            chunk = np.asarray(states[start : start + chunk_size])
+            pending[start] = executor.submit(func, chunk, rule, cutoff_dim, n_modes)
+            if len(pending) >= 2 * processes:
+                first = min(pending)
+                states[first : first + chunk_size] = pending.pop(first).result()
+        for first in sorted(pending):
+            states[first : first + chunk_size] = pending[first].result()
+    return states
@@ -1,4 +1,16 @@
 import numpy as np
+from typing import Tuple, Union
+from tptb.straw.postselect import (
+    postselect_ket,
+    postselect_dm,
+    postselect_dm_compact,
+)
+from tptb.straw.postselect_rule import vacuum, total, herald
+
+# >>> rules, True means keep <<<
+RULE_QUBIT_2_2 = ~(vacuum(0, 1) | vacuum(2, 3))
+RULE_NPHOTON_GE2 = total >= 2
+RULE_PBSCNOT = (herald(6) != 0) & (herald(7) != 0)
 
 
 def postselect_qubit_2_2_ket(state_ket: np.ndarray, cutoff_dim=5) -> np.ndarray:
@@ -6,101 +18,62 @@ def postselect_qubit_2_2_ket(state_ket: np.ndarray, cutoff_dim=5) -> np.ndarray:
     - postselect qubit 2 + 2
     - principle: 0,0,i,j -> 0; i,j,0,0 -> 0
     """
-
-    def index(i, j, k, l):
-        return i * cutoff_dim**3 + j * cutoff_dim**2 + k * cutoff_dim + l
-
-    # postselect
-    for i in range(cutoff_dim):
-        for j in range(cutoff_dim):
-            idx = index(i, j, 0, 0)
-            state_ket[idx] = 0
-            idx = index(0, 0, i, j)
-            state_ket[idx] = 0
-    return state_ket
+    return postselect_ket(state_ket, RULE_QUBIT_2_2, cutoff_dim, n_modes=4)
 
 
-def postselect_qubit_2_2_dm(state_dm: np.ndarray, cutoff_dim: int = 5) -> np.ndarray:
+def postselect_qubit_2_2_dm(
+    state_dm: np.ndarray, cutoff_dim: int = 5, compact: bool = False, dtype=None
+) -> Union[np.ndarray, Tuple[np.ndarray, np.ndarray, np.ndarray]]:
     """
     postselection of 2 qubits, density matrix approach
     - postselect qubit 2 + 2
     - principle: 0,0,i,j -> 0; i,j,0,0 -> 0
+    - compact: return (sub_dm, idx, prob) as postselect_dm_compact
+    - dtype: dtype of the result, None keeps the input dtype (without compact,
+        a cast copy is postselected instead of state_dm when the dtype differs)
     """
-
-    def index(i, j, k, l) -> int:
-        return i * cutoff_dim**3 + j * cutoff_dim**2 + k * cutoff_dim + l
-
-    # postselect
-    for i in range(cutoff_dim):
-        for j in range(cutoff_dim):
-            idx = index(i, j, 0, 0)
-            state_dm[idx, :] = 0
-            state_dm[:, idx] = 0
-            idx = index(0, 0, i, j)
-            state_dm[idx, :] = 0
-            state_dm[:, idx] = 0
-    return state_dm
+    if compact:
+        return postselect_dm_compact(
+            state_dm, RULE_QUBIT_2_2, cutoff_dim, n_modes=4, dtype=dtype
+        )
+    if dtype is not None:
+        state_dm = state_dm.astype(dtype, copy=False)
+    return postselect_dm(state_dm, RULE_QUBIT_2_2, cutoff_dim, n_modes=4)
 
 
-def postselect_nphoton_ge2_dm(state_dm: np.ndarray, cutoff_dim: int = 5) -> np.ndarray:
+def postselect_nphoton_ge2_dm(
+    state_dm: np.ndarray, cutoff_dim: int = 5, compact: bool = False, dtype=None
+) -> Union[np.ndarray, Tuple[np.ndarray, np.ndarray, np.ndarray]]:
     """
     - postselect nphoton >= 2
     - principle: sum(i,j,k,l) < 2 -> 0
+    - compact: return (sub_dm, idx, prob) as postselect_dm_compact
+    - dtype: dtype of the result, None keeps the input dtype (without compact,
+        a cast copy is postselected instead of state_dm when the dtype differs)
     """
-
-    def index(i, j, k, l) -> int:
-        return i * cutoff_dim**3 + j * cutoff_dim**2 + k * cutoff_dim + l
-
-    # postselect
-    for i in range(2):
-        for j in range(2):
-            for k in range(2):
-                for l in range(2):
-                    if i + j + k + l < 2:
-                        idx = index(i, j, k, l)
-                        state_dm[idx, :] = 0
-                        state_dm[:, idx] = 0
-    return state_dm
+    if compact:
+        return postselect_dm_compact(
+            state_dm, RULE_NPHOTON_GE2, cutoff_dim, n_modes=4, dtype=dtype
+        )
+    if dtype is not None:
+        state_dm = state_dm.astype(dtype, copy=False)
+    return postselect_dm(state_dm, RULE_NPHOTON_GE2, cutoff_dim, n_modes=4)
 
 
-def postselect_PBSCNOT_dm(state_dm: np.ndarray, cutoff_dim: int = 5) -> np.ndarray:
-    def index(i, j, k, l, a, b, c, d) -> int:
-        return (
-            i * cutoff_dim**7
-            + j * cutoff_dim**6
-            + k * cutoff_dim**5
-            + l * cutoff_dim**4
-            + a * cutoff_dim**3
-            + b * cutoff_dim**2
-            + c * cutoff_dim
-            + d
+def postselect_PBSCNOT_dm(
+    state_dm: np.ndarray, cutoff_dim: int = 5, compact: bool = False, dtype=None
+) -> Union[np.ndarray, Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+    """
+    - postselect PBS-CNOT, modes x0,x1,i,j,k,l,h0,h1
+    - principle (herald): x0,x1,i,j,k,l,0,h1 -> 0; x0,x1,i,j,k,l,h0,0 -> 0
+    - compact: return (sub_dm, idx, prob) as postselect_dm_compact
+    - dtype: dtype of the result, None keeps the input dtype (without compact,
+        a cast copy is postselected instead of state_dm when the dtype differs)
+    """
+    if compact:
+        return postselect_dm_compact(
+            state_dm, RULE_PBSCNOT, cutoff_dim, n_modes=8, dtype=dtype
         )
-
-    # postselect
-    for x0 in range(cutoff_dim):
-        for x1 in range(cutoff_dim):
-            # # postselect
-            # for i in range(cutoff_dim):
-            #     for j in range(cutoff_dim):
-            #         for h0 in range(cutoff_dim):
-            #             for h1 in range(cutoff_dim):
-            #                 idx = index(x0, x1, i, j, 0, 0, h0, h1)
-            #                 state_dm[idx, :] = 0
-            #                 state_dm[:, idx] = 0
-            #                 idx = index(x0, x1, 0, 0, i, j, h0, h1)
-            #                 state_dm[idx, :] = 0
-            #                 state_dm[:, idx] = 0
-            # herald
-            for i in range(cutoff_dim):
-                for j in range(cutoff_dim):
-                    for k in range(cutoff_dim):
-                        for l in range(cutoff_dim):
-                            for h1 in range(cutoff_dim):
-                                idx = index(x0, x1, i, j, k, l, 0, h1)
-                                state_dm[idx, :] = 0
-                                state_dm[:, idx] = 0
-                            for h0 in range(cutoff_dim):
-                                idx = index(x0, x1, i, j, k, l, h0, 0)
-                                state_dm[idx, :] = 0
-                                state_dm[:, idx] = 0
-    return state_dm
+    if dtype is not None:
+        state_dm = state_dm.astype(dtype, copy=False)
+    return postselect_dm(state_dm, RULE_PBSCNOT, cutoff_dim, n_modes=8)
@@ -0,0 +1,181 @@
+# <<< Declarative postselection rules over per-mode photon numbers. >>>
+# <<< e.g. ~(vacuum(0, 1) | vacuum(2, 3)), total >= 2, (herald(6) > 0) & (herald(7) > 0)
+# A rule is True for the basis states that are KEPT, use ~rule to turn a drop condition into a rule. >>>
+import numpy as np
+from typing import Sequence, Union
+from tptb.straw.postselect import postselect_mask, postselect_ket, postselect_dm
+
+
+def _eval_expr(key: tuple, n: Sequence[np.ndarray]):
+    op = key[0]
+    if op == "const":
+        return key[1]
+    elif op == "mode":
+        return sum(n[k] for k in key[1:])
+    elif op == "total":
+        return sum(n)
+    elif op == "add":
+        return _eval_expr(key[1], n) + _eval_expr(key[2], n)
+    elif op == "sub":
+        return _eval_expr(key[1], n) - _eval_expr(key[2], n)
+    else:
+        raise ValueError("unknown expression {:s}".format(op))
+
+
+_CMP = {
+    "==": np.equal,
+    "!=": np.not_equal,
+    "<": np.less,
+    "<=": np.less_equal,
+    ">": np.greater,
+    ">=": np.greater_equal,
+}
+
+
+def _eval_rule(key: tuple, n: Sequence[np.ndarray]):
+    op = key[0]
+    if op in _CMP:
+        return _CMP[op](_eval_expr(key[1], n), _eval_expr(key[2], n))
+    elif op == "and":
+        return _eval_rule(key[1], n) & _eval_rule(key[2], n)
+    elif op == "or":
+        return _eval_rule(key[1], n) | _eval_rule(key[2], n)
+    elif op == "not":
+        return ~np.asarray(_eval_rule(key[1], n), dtype=bool)
+    else:
+        raise ValueError("unknown rule {:s}".format(op))
+
+
+def _as_expr_key(x: Union["Expr", int]) -> tuple:
+    if isinstance(x, Expr):
+        return x._key
+    if isinstance(x, (int, np.integer)):
+        return ("const", int(x))
+    raise TypeError("photon number expression must be Expr or int")
+
+
+class Expr:
+    """Photon-number expression, comparing it with an int gives a Rule"""
+
+    __slots__ = ("_key",)
+
+    def __init__(self, key: tuple):
+        self._key = key
+
+    def __add__(self, other):
+        return Expr(("add", self._key, _as_expr_key(other)))
+
+    def __radd__(self, other):
+        return Expr(("add", _as_expr_key(other), self._key))
+
+    def __sub__(self, other):
+        return Expr(("sub", self._key, _as_expr_key(other)))
+
+    def __rsub__(self, other):
+        return Expr(("sub", _as_expr_key(other), self._key))
+
+    def _cmp(self, op: str, other) -> "Rule":
+        return Rule((op, self._key, _as_expr_key(other)))
+
+    def __eq__(self, other):  # type: ignore
+        return self._cmp("==", other)
+
+    def __ne__(self, other):  # type: ignore
+        return self._cmp("!=", other)
+
+    def __lt__(self, other):
+        return self._cmp("<", other)
+
+    def __le__(self, other):
+        return self._cmp("<=", other)
+
+    def __gt__(self, other):
+        return self._cmp(">", other)
+
+    def __ge__(self, other):
+        return self._cmp(">=", other)
+
+    __hash__ = None  # type: ignore
+
+    def __repr__(self):
+        return "Expr({!r})".format(self._key)
+
+
+class Rule:
+    """
+    Postselection rule, True for the basis states that are kept
+    - combine with |, &, ~
+    - hashable and picklable, so compiled masks are cached per rule
+    """
+
+    __slots__ = ("_key",)
+
+    def __init__(self, key: tuple):
+        self._key = key
+
+    def __call__(self, n: Sequence[np.ndarray]) -> np.ndarray:
+        return _eval_rule(self._key, n)
+
+    def __and__(self, other: "Rule") -> "Rule":
+        return Rule(("and", self._key, other._key))
+
+    def __or__(self, other: "Rule") -> "Rule":
+        return Rule(("or", self._key, other._key))
+
+    def __invert__(self) -> "Rule":
+        return Rule(("not", self._key))
+
+    def __eq__(self, other):
+        return isinstance(other, Rule) and self._key == other._key
+
+    def __hash__(self):
+        return hash(self._key)
+
+    def __bool__(self):
+        raise TypeError("Rule has no truth value, combine rules with |, &, ~")
+
+    def __repr__(self):
+        return "Rule({!r})".format(self._key)
+
+    def compile(self, cutoff_dim: int, n_modes: int) -> np.ndarray:
+        """Flat bool mask (cached) of the kept basis states"""
+        return postselect_mask(self, cutoff_dim, n_modes)
+
+    def apply_ket(
+        self,
+        state_ket: np.ndarray,
+        cutoff_dim: int = 5,
+        n_modes: Union[int, None] = None,
+    ) -> np.ndarray:
+        return postselect_ket(state_ket, self, cutoff_dim, n_modes)
+
+    def apply_dm(
+        self,
+        state_dm: np.ndarray,
+        cutoff_dim: int = 5,
+        n_modes: Union[int, None] = None,
+    ) -> np.ndarray:
+        return postselect_dm(state_dm, self, cutoff_dim, n_modes)
+
+
+def mode(*modes: int) -> Expr:
+    """Photon number in the given modes (summed)"""
+    if len(modes) == 0:
+        raise ValueError("mode() needs at least one mode")
+    return Expr(("mode",) + tuple(int(k) for k in modes))
+
+
+# heralding detectors are just modes, herald(6) == 0 reads better in circuits
+herald = mode
+
+total = Expr(("total",))
+
+
+def vacuum(*modes: int) -> Rule:
+    """All the given modes are in vacuum"""
+    if len(modes) == 0:
+        raise ValueError("vacuum() needs at least one mode")
+    rule = mode(modes[0]) == 0
+    for k in modes[1:]:
+        rule = rule & (mode(k) == 0)
+    return rule
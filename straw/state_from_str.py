@@ -1,95 +1,148 @@
 import numpy as np
-from typing import Callable
+from functools import lru_cache
+from typing import Callable, NamedTuple, Tuple, Union
 
 
-def _tensor_dot(*args) -> np.ndarray:
+def _tensor_dot(*args, dtype=None) -> np.ndarray:
     """
     - Tensor product of input matrices
+    - dtype: None: common dtype of the inputs
     - Return dimension: (d1, d2, ..., dn)
     """
-    res = 1
+    res = np.ones((), dtype=dtype or np.result_type(*args))
     for op in args:
-        res = np.tensordot(res, op, axes=0)
+        res = np.tensordot(res, op.astype(res.dtype, copy=False), axes=0)
     return res
 
 
-def _tensor_kron(*args) -> np.ndarray:
+def _tensor_kron(*args, dtype=None) -> np.ndarray:
     """
     - Tensor product of input matrices
+    - dtype: None: common dtype of the inputs
     - Return dimension: (d1*d2*...*dn)"""
-    res = 1
+    res = np.ones((), dtype=dtype or np.result_type(*args))
     for op in args:
-        res = np.kron(res, op)
+        res = np.kron(res, op.astype(res.dtype, copy=False))
     return res
 
 
-def _tensor_func(*args, t: str) -> np.ndarray:
+def _tensor_func(*args, t: str, dtype=None) -> np.ndarray:
     if t == "tensor":
-        return _tensor_dot(*args)
+        return _tensor_dot(*args, dtype=dtype)
     elif t == "kron":
-        return _tensor_kron(*args)
+        return _tensor_kron(*args, dtype=dtype)
     else:
         raise ValueError("t must be tensor or kron")
 
 
-def _fock_n(n: int, cutoff_dims: int) -> np.ndarray:
+def _fock_n(n: int, cutoff_dims: int, dtype=np.float64) -> np.ndarray:
     """Fock state |n>"""
-    _fock = np.zeros(cutoff_dims)
+    _fock = np.zeros(cutoff_dims, dtype=dtype)
     _fock[n] = 1
     return _fock
 
 
+class SparseKet(NamedTuple):
+    """
+    Compact ket: amplitudes on the flat (kron layout) indices, zero elsewhere
+    - indices: sorted unique flat indices
+    - amplitudes: amplitude of each index
+    - cutoff_dims, n_modes: full space is cutoff_dims**n_modes
+    """
+
+    indices: np.ndarray
+    amplitudes: np.ndarray
+    cutoff_dims: int
+    n_modes: int
+
+    def to_dense(self, t: str = "kron") -> np.ndarray:
+        """
+        Scatter into a dense ket, same dtype as amplitudes
+        - t: "tensor" / "kron"
+        """
+        state = np.zeros(self.cutoff_dims**self.n_modes, dtype=self.amplitudes.dtype)
+        state[self.indices] = self.amplitudes
+        if t == "tensor":
+            return state.reshape((self.cutoff_dims,) * self.n_modes)
+        elif t == "kron":
+            return state
+        else:
+            raise ValueError("t must be tensor or kron")
+
+
+def _mono_fock_occupation(state_str: str) -> Tuple[int, ...]:
+    """00 / 012 / 123 -> photon number of each mode"""
+    return tuple(int(ch) for ch in state_str)
+
+
+def _mono_qubit_occupation(state_str: str) -> Tuple[int, ...]:
+    """0 / 01 / 0101 -> photon number of each mode, dual-rail 0: 10, 1: 01"""
+    occupation = []
+    for ch in state_str:
+        if ch == "0":
+            occupation += [1, 0]
+        elif ch == "1":
+            occupation += [0, 1]
+        else:
+            raise ValueError("qubit state_str must be 0 or 1")
+    return tuple(occupation)
+
+
+def _mono_index(occupation: Tuple[int, ...], cutoff_dims: int) -> int:
+    """flat index of |n0, n1, ...> in the kron layout"""
+    if any(n >= cutoff_dims for n in occupation):
+        raise ValueError(
+            "photon number exceeds cutoff_dims {:d}: {}".format(cutoff_dims, occupation)
+        )
+    idx = 0
+    for n in occupation:
+        idx = idx * cutoff_dims + n
+    return idx
+
+
+def _mono_state(
+    occupation: Tuple[int, ...], cutoff_dims: int, t: str = "kron", dtype=np.float64
+) -> np.ndarray:
+    return SparseKet(
+        np.array([_mono_index(occupation, cutoff_dims)]),
+        np.ones(1, dtype=dtype),
+        cutoff_dims,
+        len(occupation),
+    ).to_dense(t)
+
+
 def _mono_fock_state_from_str(
-    state_str: str, cutoff_dims: int, t: str = "kron"
+    state_str: str, cutoff_dims: int, t: str = "kron", dtype=np.float64
 ) -> np.ndarray:
     """
     - state_str: 00 / 012 / 123
     - cutoff_dims: int
     - t: "tensor" / "kron"
     """
-    state_list = []
-    for ch in state_str:
-        state_list.append(_fock_n(int(ch), cutoff_dims))
-    return _tensor_func(*state_list, t=t)
+    return _mono_state(_mono_fock_occupation(state_str), cutoff_dims, t, dtype)
 
 
 def _mono_qubit_state_from_str(
-    state_str: str, cutoff_dims: int, t: str = "kron"
+    state_str: str, cutoff_dims: int, t: str = "kron", dtype=np.float64
 ) -> np.ndarray:
     """
     - state_str: 0 / 01 / 0101
     - cutoff_dims: int
     - t: "tensor" / "kron"
     """
-    #
-    Fock_0 = _fock_n(0, cutoff_dims)
-    Fock_1 = _fock_n(1, cutoff_dims)
-    state_list = []
-    for ch in state_str:
-        if ch == "0":
-            state_list.append(Fock_1)
-            state_list.append(Fock_0)
-        elif ch == "1":
-            state_list.append(Fock_0)
-            state_list.append(Fock_1)
-        else:
-            raise ValueError("qubit state_str must be 0 or 1")
-    return _tensor_func(*state_list, t=t)
+    return _mono_state(_mono_qubit_occupation(state_str), cutoff_dims, t, dtype)
 
 
-def state_from_str(
-    mono_state_from_str_func: Callable,
-    state_str: str,
-    cutoff_dims: int,
-    t: str = "kron",
-) -> np.ndarray:
-    """
-    - mono_state_from_str_func: either fock state or qubit state
-    - state_str: 01 / 00+11 / 00-01+11
-    - cutoff_dims: int
-    - t: "tensor" / "kron"
-    """
-    states_list = []
+_MONO_OCCUPATION_FUNCS = {
+    _mono_fock_state_from_str: _mono_fock_occupation,
+    _mono_qubit_state_from_str: _mono_qubit_occupation,
+}
+
+
+@lru_cache(maxsize=None)
+def _parse_state_str(state_str: str) -> Tuple[Tuple[int, str], ...]:
+    """01 / 00+11 / 00-01+11 -> ((sign, mono_str), ...)"""
+    terms = []
     current_number = ""
     sign = 1
 
@@ -98,9 +151,7 @@ def state_from_str(
             current_number += char
         else:
             if current_number:
-                states_list.append(
-                    sign * mono_state_from_str_func(current_number, cutoff_dims, t)
-                )
+                terms.append((sign, current_number))
                 current_number = ""
             if char == "+":
                 sign = 1
@@ -108,32 +159,104 @@ def state_from_str(
                 sign = -1
 
     if current_number:
-        states_list.append(
-            sign * mono_state_from_str_func(current_number, cutoff_dims, t)
-        )
+        terms.append((sign, current_number))
+    return tuple(terms)
 
+
+@lru_cache(maxsize=None)
+def _sparse_state_from_str(
+    mono_state_from_str_func: Callable, state_str: str, cutoff_dims: int
+) -> SparseKet:
+    occupation_func = _MONO_OCCUPATION_FUNCS[mono_state_from_str_func]
+    terms = _parse_state_str(state_str)
+    occupations = [occupation_func(mono_str) for _, mono_str in terms]
+    n_modes = len(occupations[0])
+    if any(len(occ) != n_modes for occ in occupations):
+        raise ValueError("all terms of state_str must have the same length")
+    flat_idx = np.array([_mono_index(occ, cutoff_dims) for occ in occupations])
+    signs = np.array([sign for sign, _ in terms], dtype=float)
+    # repeated terms add up, as in the dense sum
+    indices, inverse = np.unique(flat_idx, return_inverse=True)
+    amplitudes = np.zeros(len(indices))
+    np.add.at(amplitudes, inverse, signs / np.sqrt(len(terms)))
+    indices.flags.writeable = False
+    amplitudes.flags.writeable = False
+    return SparseKet(indices, amplitudes, cutoff_dims, n_modes)
+
+
+def state_from_str(
+    mono_state_from_str_func: Callable,
+    state_str: str,
+    cutoff_dims: int,
+    t: str = "kron",
+    sparse: bool = False,
+    dtype=np.float64,
+) -> Union[np.ndarray, SparseKet]:
+    """
+    - mono_state_from_str_func: either fock state or qubit state
+    - state_str: 01 / 00+11 / 00-01+11
+    - cutoff_dims: int
+    - t: "tensor" / "kron"
+    - sparse: return a SparseKet (indices, amplitudes) instead of a dense ket
+    - dtype: e.g. np.float32 / np.complex64 to halve the memory
+    """
+    if mono_state_from_str_func in _MONO_OCCUPATION_FUNCS:
+        # parsed and cached, dense ket is filled in one scatter
+        sparse_ket = _sparse_state_from_str(
+            mono_state_from_str_func, state_str, cutoff_dims
+        )
+        sparse_ket = sparse_ket._replace(
+            amplitudes=sparse_ket.amplitudes.astype(dtype, copy=False)
+        )
+        return sparse_ket if sparse else sparse_ket.to_dense(t)
     #
-    return sum(states_list) / np.sqrt(len(states_list))
+    if sparse:
+        raise ValueError("sparse output needs a built-in mono_state_from_str_func")
+    # terms are added one at a time into a single array of the requested dtype
+    terms = _parse_state_str(state_str)
+    state = None
+    for sign, mono_str in terms:
+        mono = mono_state_from_str_func(mono_str, cutoff_dims, t)
+        if state is None:
+            state = np.zeros(mono.shape, dtype=dtype)
+        if sign > 0:
+            state += mono
+        else:
+            state -= mono
+    state /= np.sqrt(len(terms))
+    return state
 
 
 def qubit_state_from_str(
-    state_str: str, cutoff_dims: int, t: str = "kron"
-) -> np.ndarray:
-    return state_from_str(_mono_qubit_state_from_str, state_str, cutoff_dims, t)
+    state_str: str,
+    cutoff_dims: int,
+    t: str = "kron",
+    sparse: bool = False,
+    dtype=np.float64,
+) -> Union[np.ndarray, SparseKet]:
+    return state_from_str(
+        _mono_qubit_state_from_str, state_str, cutoff_dims, t, sparse, dtype
+    )
 
 
 def fock_state_from_str(
-    state_str: str, cutoff_dims: int, t: str = "kron"
-) -> np.ndarray:
-    return state_from_str(_mono_fock_state_from_str, state_str, cutoff_dims, t)
+    state_str: str,
+    cutoff_dims: int,
+    t: str = "kron",
+    sparse: bool = False,
+    dtype=np.float64,
+) -> Union[np.ndarray, SparseKet]:
+    return state_from_str(
+        _mono_fock_state_from_str, state_str, cutoff_dims, t, sparse, dtype
+    )
 
 
-def bell_state(cutoff_dims: int, t: str = "kron") -> np.ndarray:
+def bell_state(cutoff_dims: int, t: str = "kron", dtype=np.float64) -> np.ndarray:
     """
     bell state: 00+11
     - t: "tensor" / "kron"
     """
-    return qubit_state_from_str("00+11", cutoff_dims, t)
+    return qubit_state_from_str("00+11", cutoff_dims, t, dtype=dtype)
 
 
 if __name__ == "__main__":
@@ -1,9 +1,13 @@
 # <<< This file is intended to convert density matrix from Strawberry Fields to QuTiP, and vice versa. >>>
 # <<< For Strawberry Fields, the density matrix is in the form of rho_{iijjkkll},
 # while for QuTiP, it is rho_{ijkl,ijkl}. >>>
+# <<< The conversion is a pure axis permutation, so it is done with (cached) transposes,
+# returning views where the layout allows it. Any leading axes are batch axes. >>>
 import numpy as np
 import string
+from functools import lru_cache
 from itertools import cycle
+from typing import Tuple
 
 
 def _create_einstr(N: int) -> str:
@@ -30,17 +34,101 @@ def inv_reshape_dm_einstr(N: int) -> str:
     return einstr
 
 
-def straw2qt(state_dm: np.ndarray, cutoff_dim: int = 5, N: int = 4) -> np.ndarray:
-    state_dm = np.einsum(reshape_dm_einstr(N), state_dm)  # rho_{i,j,k,l,i,j,k,l}
-    state_dm = state_dm.reshape(cutoff_dim**N, cutoff_dim**N)  # rho_{ijkl, ijkl}
+@lru_cache(maxsize=None)
+def _straw2qt_perm(N: int) -> Tuple[int, ...]:
+    """N=4: axes of iijjkkll ordered as ijklijkl, i.e. (0, 2, 4, 6, 1, 3, 5, 7)"""
+    return tuple(range(0, 2 * N, 2)) + tuple(range(1, 2 * N, 2))
+
+
+@lru_cache(maxsize=None)
+def _qt2straw_perm(N: int) -> Tuple[int, ...]:
+    """N=4: axes of ijklijkl ordered as iijjkkll, i.e. (0, 4, 1, 5, 2, 6, 3, 7)"""
+    return tuple(int(i) for i in np.argsort(_straw2qt_perm(N)))
+
+
+def _batch_perm(perm: Tuple[int, ...], n_batch: int) -> Tuple[int, ...]:
+    return tuple(range(n_batch)) + tuple(n_batch + p for p in perm)
+
+
+def straw2qt_tensor(state_dm: np.ndarray, N: int = 4) -> np.ndarray:
+    """
+    rho_{iijjkkll} -> rho_{i,j,k,l,i,j,k,l}, zero-copy
+    - state_dm: (..., d, d, ..., d, d) with 2N mode axes, leading axes are batch axes
+    - Return: (..., d, ..., d) view with axes ijklijkl, straw2qt merges them
+    """
+    n_batch = state_dm.ndim - 2 * N
+    return state_dm.transpose(_batch_perm(_straw2qt_perm(N), n_batch))
+
+
+def straw2qt(
+    state_dm: np.ndarray,
+    cutoff_dim: int = 5,
+    N: int = 4,
+    copy: bool = True,
+    dtype=None,
+) -> np.ndarray:
+    """
+    rho_{iijjkkll} -> rho_{ijkl, ijkl}
+    - state_dm: (..., d, d, ..., d, d) with 2N mode axes, leading axes are batch axes
+    - copy: True: contiguous result, False: a view if the axes can be merged without
+        a copy (else a copy all the same), see straw2qt_tensor for an unmerged view
+    - dtype: cast during the copy, None keeps the input dtype
+    - Return: (..., d**N, d**N)
+    """
+    n_batch = state_dm.ndim - 2 * N
+    state_dm = straw2qt_tensor(state_dm, N)  # rho_{i,j,k,l,i,j,k,l}
+    shape = state_dm.shape[:n_batch] + (cutoff_dim**N, cutoff_dim**N)
+    if copy:
+        state_dm = np.ascontiguousarray(state_dm, dtype=dtype)
+    state_dm = state_dm.reshape(shape)  # rho_{ijkl, ijkl}
+    if dtype is not None:
+        state_dm = state_dm.astype(dtype, copy=False)
     return state_dm
 
 
-def qt2straw(state_dm: np.ndarray, cutoff_dim: int = 5, N: int = 4) -> np.ndarray:
-    shape_straw = tuple([cutoff_dim] * (2 * N))
+def qt2straw(
+    state_dm: np.ndarray,
+    cutoff_dim: int = 5,
+    N: int = 4,
+    copy: bool = True,
+    dtype=None,
+) -> np.ndarray:
+    """
+    rho_{ijkl, ijkl} -> rho_{iijjkkll}
+    - state_dm: (..., d**N, d**N), leading axes are batch axes
+    - copy: True: contiguous result, False: zero-copy transposed view if possible
+    - dtype: cast during the copy, None keeps the input dtype
+    """
+    batch_shape = state_dm.shape[:-2]
+    shape_straw = batch_shape + (cutoff_dim,) * (2 * N)
     state_dm = state_dm.reshape(shape_straw)  # rho_{i,j,k,l,i,j,k,l}
-    state_dm = np.einsum(inv_reshape_dm_einstr(N), state_dm)  # rho_{i,i,j,j,k,k,l,l}
-    return state_dm
+    state_dm = state_dm.transpose(_batch_perm(_qt2straw_perm(N), len(batch_shape)))
+    if copy:
+        state_dm = np.ascontiguousarray(state_dm, dtype=dtype)
+    elif dtype is not None:
+        state_dm = state_dm.astype(dtype, copy=False)
+    return state_dm  # rho_{i,i,j,j,k,k,l,l}
+
+
+def ket_tensor2kron(
+    state_ket: np.ndarray, cutoff_dim: int = 5, N: int = 4
+) -> np.ndarray:
+    """
+    ket (..., d, ..., d) in "tensor" layout -> (..., d**N) in "kron" layout
+    - zero-copy view for contiguous input
+    """
+    batch_shape = state_ket.shape[: state_ket.ndim - N]
+    return state_ket.reshape(batch_shape + (cutoff_dim**N,))
+
+
+def ket_kron2tensor(
+    state_ket: np.ndarray, cutoff_dim: int = 5, N: int = 4
+) -> np.ndarray:
+    """
+    ket (..., d**N) in "kron" layout -> (..., d, ..., d) in "tensor" layout
+    - zero-copy view for contiguous input
+    """
+    return state_ket.reshape(state_ket.shape[:-1] + (cutoff_dim,) * N)
 
 
 if __name__ == "__main__":
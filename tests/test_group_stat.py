@@ -0,0 +1,79 @@
+# <<< The sort-based per-x statistics (tptb.io.csvf.group_stat) against the original per-x loop. >>>
+import numpy as np
+import pytest
+from tptb.io.csvf import csv_append_line, group_stat, load_csv_data_with_stat
+
+
+# >>> original implementation <<<
+def _loop_stat(datax, datay, select_func=None):
+    if select_func is not None:
+        select_mask = select_func(datax, datay)
+        datax = datax[select_mask]
+        datay = datay[select_mask]
+    x_set = sorted(list(set(datax)))
+    mean_y_list = []
+    std_y_list = []
+    for x in x_set:
+        y_x = datay[datax == x]
+        mean_y_list.append(np.mean(y_x))
+        std_y_list.append(np.std(y_x))
+    return np.array(x_set), np.array(mean_y_list), np.array(std_y_list)
+
+
+def _random_data(n=500, n_x=17, seed=0):
+    rng = np.random.default_rng(seed)
+    datax = rng.choice(np.linspace(-1, 1, n_x), size=n)
+    datay = rng.normal(size=n) * 10 + datax
+    return datax, datay
+
+
+@pytest.mark.parametrize("n, n_x", [(1, 1), (50, 50), (500, 17), (2000, 3)])
+def test_mean_std(n, n_x):
+    datax, datay = _random_data(n, n_x)
+    x, mean, std = group_stat(datax, datay)
+    x0, mean0, std0 = _loop_stat(datax, datay)
+    np.testing.assert_array_equal(x, x0)
+    np.testing.assert_allclose(mean, mean0, rtol=1e-12, atol=1e-12)
+    np.testing.assert_allclose(std, std0, rtol=1e-12, atol=1e-12)
+
+
+def test_other_stats():
+    datax, datay = _random_data()
+    x, count, median, mn, mx, sem = group_stat(
+        datax, datay, ("count", "median", "min", "max", "sem")
+    )
+    for i, x_i in enumerate(x):
+        y_x = datay[datax == x_i]
+        assert count[i] == len(y_x)
+        assert median[i] == pytest.approx(np.median(y_x))
+        assert mn[i] == np.min(y_x) and mx[i] == np.max(y_x)
+        assert sem[i] == pytest.approx(np.std(y_x, ddof=1) / np.sqrt(len(y_x)))
+
+
+def test_several_y_columns():
+    datax, datay = _random_data()
+    datay2 = np.column_stack((datay, -2 * datay))
+    x, mean, std = group_stat(datax, datay2)
+    for k in range(2):
+        x0, mean0, std0 = _loop_stat(datax, datay2[:, k])
+        np.testing.assert_allclose(mean[:, k], mean0, rtol=1e-12, atol=1e-12)
+        np.testing.assert_allclose(std[:, k], std0, rtol=1e-12, atol=1e-12)
+
+
+def test_empty():
+    x, mean, std = group_stat(np.empty(0), np.empty(0))
+    assert len(x) == len(mean) == len(std) == 0
+
+
+def test_load_csv_data_with_stat(tmp_path):
+    fileName = str(tmp_path / "data.csv")
+    datax, datay = _random_data(200)
+    csv_append_line(fileName, ["x", "y"])
+    for x_i, y_i in zip(datax, datay):
+        csv_append_line(fileName, [repr(float(x_i)), repr(float(y_i))])
+    select_func = lambda x, y: y > 0
+    x, mean, std = load_csv_data_with_stat(fileName, "x", "y", select_func)
+    x0, mean0, std0 = _loop_stat(datax, datay, select_func)
+    np.testing.assert_array_equal(x, x0)
+    np.testing.assert_allclose(mean, mean0, rtol=1e-12)
+    np.testing.assert_allclose(std, std0, rtol=1e-12)
@@ -0,0 +1,124 @@
+# <<< The vectorized postselection (tptb.straw.postselect) against the original per-index loops. >>>
+import numpy as np
+import pytest
+from tptb.straw.postselect import postselect_mask, postselect_ket, postselect_dm
+from tptb.straw.postselect_func import (
+    RULE_QUBIT_2_2,
+    postselect_qubit_2_2_ket,
+    postselect_qubit_2_2_dm,
+    postselect_nphoton_ge2_dm,
+    postselect_PBSCNOT_dm,
+)
+
+
+# >>> original implementations <<<
+def _index(cutoff_dim, *n):
+    return sum(n_k * cutoff_dim ** (len(n) - 1 - k) for k, n_k in enumerate(n))
+
+
+def _loop_qubit_2_2_ket(state_ket, cutoff_dim):
+    for i in range(cutoff_dim):
+        for j in range(cutoff_dim):
+            state_ket[_index(cutoff_dim, i, j, 0, 0)] = 0
+            state_ket[_index(cutoff_dim, 0, 0, i, j)] = 0
+    return state_ket
+
+
+def _loop_qubit_2_2_dm(state_dm, cutoff_dim):
+    for i in range(cutoff_dim):
+        for j in range(cutoff_dim):
+            for idx in (_index(cutoff_dim, i, j, 0, 0), _index(cutoff_dim, 0, 0, i, j)):
+                state_dm[idx, :] = 0
+                state_dm[:, idx] = 0
+    return state_dm
+
+
+def _loop_nphoton_ge2_dm(state_dm, cutoff_dim):
+    for i in range(2):
+        for j in range(2):
+            for k in range(2):
+                for l in range(2):
+                    if i + j + k + l < 2:
+                        idx = _index(cutoff_dim, i, j, k, l)
+                        state_dm[idx, :] = 0
+                        state_dm[:, idx] = 0
+    return state_dm
+
+
+def _loop_PBSCNOT_dm(state_dm, cutoff_dim):
+    d = cutoff_dim
+    for x0 in range(d):
+        for x1 in range(d):
+            for i in range(d):
+                for j in range(d):
+                    for k in range(d):
+                        for l in range(d):
+                            for h in range(d):
+                                for idx in (
+                                    _index(d, x0, x1, i, j, k, l, 0, h),
+                                    _index(d, x0, x1, i, j, k, l, h, 0),
+                                ):
+                                    state_dm[idx, :] = 0
+                                    state_dm[:, idx] = 0
+    return state_dm
+
+
+# >>> helpers <<<
+def _random_ket(D, seed=0):
+    rng = np.random.default_rng(seed)
+    return rng.normal(size=D) + 1j * rng.normal(size=D)
+
+
+def _random_dm(D, seed=0):
+    ket = _random_ket(D, seed)
+    return np.outer(ket, ket.conj())
+
+
+@pytest.mark.parametrize("cutoff_dim", [2, 3, 5])
+def test_qubit_2_2_ket(cutoff_dim):
+    ket = _random_ket(cutoff_dim**4)
+    expected = _loop_qubit_2_2_ket(ket.copy(), cutoff_dim)
+    np.testing.assert_array_equal(postselect_qubit_2_2_ket(ket, cutoff_dim), expected)
+
+
+@pytest.mark.parametrize("cutoff_dim", [2, 3, 5])
+def test_qubit_2_2_dm(cutoff_dim):
+    dm = _random_dm(cutoff_dim**4)
+    expected = _loop_qubit_2_2_dm(dm.copy(), cutoff_dim)
+    np.testing.assert_array_equal(postselect_qubit_2_2_dm(dm, cutoff_dim), expected)
+
+
+@pytest.mark.parametrize("cutoff_dim", [2, 3, 5])
+def test_nphoton_ge2_dm(cutoff_dim):
+    dm = _random_dm(cutoff_dim**4)
+    expected = _loop_nphoton_ge2_dm(dm.copy(), cutoff_dim)
+    np.testing.assert_array_equal(postselect_nphoton_ge2_dm(dm, cutoff_dim), expected)
+
+
+@pytest.mark.parametrize("cutoff_dim", [2, 3])
+def test_PBSCNOT_dm(cutoff_dim):
+    dm = _random_dm(cutoff_dim**8)
+    expected = _loop_PBSCNOT_dm(dm.copy(), cutoff_dim)
+    np.testing.assert_array_equal(postselect_PBSCNOT_dm(dm, cutoff_dim), expected)
+
+
+def test_mask_matches_loop():
+    cutoff_dim = 3
+    ket = _loop_qubit_2_2_ket(np.ones(cutoff_dim**4), cutoff_dim)
+    mask = postselect_mask(RULE_QUBIT_2_2, cutoff_dim, 4)
+    np.testing.assert_array_equal(mask, ket != 0)
+    assert not mask.flags.writeable
+
+
+def test_batch_matches_single():
+    cutoff_dim = 3
+    kets = np.stack([_random_ket(cutoff_dim**4, seed) for seed in range(4)])
+    dms = np.stack([_random_dm(cutoff_dim**4, seed) for seed in range(4)])
+    expected_kets = [_loop_qubit_2_2_ket(k.copy(), cutoff_dim) for k in kets]
+    expected_dms = [_loop_qubit_2_2_dm(d.copy(), cutoff_dim) for d in dms]
+    np.testing.assert_array_equal(
+        postselect_ket(kets, RULE_QUBIT_2_2, cutoff_dim), expected_kets
+    )
+    np.testing.assert_array_equal(
+        postselect_dm(dms, RULE_QUBIT_2_2, cutoff_dim), expected_dms
+    )
@@ -0,0 +1,118 @@
+# <<< Smoothing (tptb.data.smooth) against the original 1D convolution, and chunked /
+# streaming smoothing against one call on the whole array. >>>
+import numpy as np
+import pytest
+from tptb.data.process import smooth_1d_data
+from tptb.data.smooth import smooth, StreamingSmoother
+
+CASES = [
+    ("boxcar", 5, {}),
+    ("boxcar", 4, {"edge": "shrink"}),
+    ("boxcar", 6, {"edge": "nan"}),
+    ("median", 7, {}),
+    ("savgol", 11, {"polyorder": 3}),
+    ("exponential", 3, {"alpha": 0.3}),
+]
+
+
+# >>> original implementation <<<
+def _convolve_smooth_1d(data, window_size):
+    kernel = np.ones(window_size) / window_size
+    y_smooth = np.convolve(data, kernel, mode="same")
+    for i in range(window_size // 2):
+        y_smooth[i] = data[i]
+    for i in range(-window_size // 2, 0):
+        y_smooth[i] = data[i]
+    return y_smooth
+
+
+def _random_walk(shape, seed=0):
+    return np.random.default_rng(seed).normal(size=shape).cumsum(axis=-1)
+
+
+@pytest.mark.parametrize("window_size", [1, 2, 3, 4, 5, 10])
+@pytest.mark.parametrize("n", [10, 20, 101])
+def test_smooth_1d_data(window_size, n):
+    data = _random_walk(n)
+    np.testing.assert_allclose(
+        smooth_1d_data(data, window_size),
+        _convolve_smooth_1d(data, window_size),
+        rtol=1e-10,
+        atol=1e-10,
+    )
+
+
+@pytest.mark.parametrize("window_size", [3, 5, 9])
+def test_boxcar_matches_convolution(window_size):
+    data = _random_walk(200)
+    expected = _convolve_smooth_1d(data, window_size)
+    # the original also kept one extra point unsmoothed at the end for odd windows
+    valid = slice(window_size // 2, -(window_size // 2) - 1)
+    np.testing.assert_allclose(
+        smooth(data, window_size)[valid], expected[valid], rtol=1e-10
+    )
+
+
+@pytest.mark.parametrize("method, window_size, kwargs", CASES)
+@pytest.mark.parametrize("axis", [0, 1, -1])
+def test_nd_matches_1d(method, window_size, kwargs, axis):
+    stack = _random_walk((4, 60))
+    data = np.moveaxis(stack, -1, axis)
+    result = smooth(data, window_size, method, axis=axis, **kwargs)
+    for i, trace in enumerate(stack):
+        np.testing.assert_allclose(
+            np.moveaxis(result, axis, -1)[i],
+            smooth(trace, window_size, method, **kwargs),
+            equal_nan=True,
+        )
+
+
+@pytest.mark.parametrize("method, window_size, kwargs", CASES)
+@pytest.mark.parametrize("chunk_size", [1, 3, 100, 1000, 1009, 5000])
+def test_chunked_memmap(tmp_path, method, window_size, kwargs, chunk_size):
+    data = np.lib.format.open_memmap(
+        str(tmp_path / "data.npy"), mode="w+", dtype=float, shape=(1009,)
+    )
+    data[:] = _random_walk(1009)
+    out = np.lib.format.open_memmap(
+        str(tmp_path / "out.npy"), mode="w+", dtype=float, shape=(1009,)
+    )
+    expected = smooth(np.array(data), window_size, method, **kwargs)
+    result = smooth(data, window_size, method, out=out, chunk_size=chunk_size, **kwargs)
+    assert result is out
+    np.testing.assert_allclose(out, expected, equal_nan=True)
+
+
+@pytest.mark.parametrize("method, window_size, kwargs", CASES)
+@pytest.mark.parametrize("axis", [0, 1, 2])
+def test_chunked_nd(method, window_size, kwargs, axis):
+    data = _random_walk((12, 50, 3))
+    if method == "savgol" and data.shape[axis] < window_size:
+        pytest.skip("savgol needs at least one window of data")
+    np.testing.assert_allclose(
+        smooth(data, window_size, method, axis=axis, chunk_size=7, **kwargs),
+        smooth(data, window_size, method, axis=axis, **kwargs),
+        equal_nan=True,
+    )
+
+
+@pytest.mark.parametrize("method", ["boxcar", "median", "exponential"])
+def test_streaming(method):
+    window_size, alpha = 4, 0.4
+    data = _random_walk((2, 300))
+    smoother = StreamingSmoother(window_size, method, alpha=alpha)
+    chunks = np.array_split(data, [1, 2, 50, 51, 200], axis=-1)
+    result = np.concatenate([smoother.update(chunk) for chunk in chunks], axis=-1)
+    # causal reference, the trailing window of each point
+    if method == "exponential":
+        expected = smooth(data, method="exponential", alpha=alpha)
+    else:
+        func = np.mean if method == "boxcar" else np.median
+        expected = np.stack(
+            [
+                func(data[:, max(i - window_size + 1, 0) : i + 1], axis=-1)
+                for i in range(data.shape[-1])
+            ],
+            axis=-1,
+        )
+    np.testing.assert_allclose(result, expected, rtol=1e-10)
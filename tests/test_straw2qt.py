@@ -0,0 +1,80 @@
+# <<< The transpose-based layout conversion (tptb.straw.straw2qt) against the original einsum. >>>
+import numpy as np
+import pytest
+from tptb.straw.straw2qt import (
+    straw2qt,
+    straw2qt_tensor,
+    qt2straw,
+    reshape_dm_einstr,
+    inv_reshape_dm_einstr,
+)
+
+
+# >>> original implementations <<<
+def _einsum_straw2qt(state_dm, cutoff_dim, N):
+    state_dm = np.einsum(reshape_dm_einstr(N), state_dm)
+    return state_dm.reshape(cutoff_dim**N, cutoff_dim**N)
+
+
+def _einsum_qt2straw(state_dm, cutoff_dim, N):
+    state_dm = state_dm.reshape((cutoff_dim,) * (2 * N))
+    return np.einsum(inv_reshape_dm_einstr(N), state_dm)
+
+
+def _random(shape, seed=0):
+    rng = np.random.default_rng(seed)
+    return rng.normal(size=shape) + 1j * rng.normal(size=shape)
+
+
+@pytest.mark.parametrize("cutoff_dim, N", [(2, 1), (3, 2), (3, 4), (5, 3)])
+def test_straw2qt(cutoff_dim, N):
+    state = _random((cutoff_dim,) * (2 * N))
+    result = straw2qt(state, cutoff_dim, N)
+    np.testing.assert_array_equal(result, _einsum_straw2qt(state, cutoff_dim, N))
+    assert result.flags.c_contiguous
+
+
+@pytest.mark.parametrize("cutoff_dim, N", [(2, 1), (3, 2), (3, 4)])
+def test_straw2qt_no_copy(cutoff_dim, N):
+    state = _random((2,) + (cutoff_dim,) * (2 * N))
+    # same shape and values whether or not a copy is made
+    np.testing.assert_array_equal(
+        straw2qt(state, cutoff_dim, N, copy=False), straw2qt(state, cutoff_dim, N)
+    )
+    view = straw2qt_tensor(state, N)
+    assert np.shares_memory(view, state)
+    np.testing.assert_array_equal(
+        view.reshape(2, cutoff_dim**N, cutoff_dim**N), straw2qt(state, cutoff_dim, N)
+    )
+
+
+@pytest.mark.parametrize("cutoff_dim, N", [(2, 1), (3, 2), (3, 4), (5, 3)])
+def test_qt2straw(cutoff_dim, N):
+    state = _random((cutoff_dim**N, cutoff_dim**N))
+    result = qt2straw(state, cutoff_dim, N)
+    np.testing.assert_array_equal(result, _einsum_qt2straw(state, cutoff_dim, N))
+    assert result.flags.c_contiguous
+    view = qt2straw(state, cutoff_dim, N, copy=False)
+    np.testing.assert_array_equal(view, result)
+
+
+def test_batch():
+    cutoff_dim, N = 3, 2
+    states = _random((2, 3) + (cutoff_dim,) * (2 * N))
+    result = straw2qt(states, cutoff_dim, N)
+    assert result.shape == (2, 3, cutoff_dim**N, cutoff_dim**N)
+    for b in np.ndindex(2, 3):
+        np.testing.assert_array_equal(
+            result[b], _einsum_straw2qt(states[b], cutoff_dim, N)
+        )
+    np.testing.assert_array_equal(qt2straw(result, cutoff_dim, N), states)
+
+
+def test_dtype():
+    cutoff_dim, N = 3, 2
+    state = _random((cutoff_dim,) * (2 * N))
+    result = straw2qt(state, cutoff_dim, N, dtype=np.complex64)
+    assert result.dtype == np.complex64
+    np.testing.assert_allclose(
+        result, _einsum_straw2qt(state, cutoff_dim, N), rtol=1e-6
+    )
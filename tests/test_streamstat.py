@@ -0,0 +1,80 @@
+# <<< Incremental per-x statistics (tptb.io.streamstat) against a full reload of the data. >>>
+import numpy as np
+import pytest
+from tptb.io.csvf import csv_append_line, group_stat, load_csv_data_with_stat
+from tptb.io.streamstat import RunningGroupStat, CsvStatLoader
+
+STATS = ("mean", "std", "count", "sem", "min", "max")
+
+
+def _random_data(n=600, n_x=13, seed=0):
+    rng = np.random.default_rng(seed)
+    datax = rng.choice(np.linspace(0, 1, n_x), size=n)
+    datay = rng.normal(size=(n, 2)) * 5 + datax[:, None]
+    return datax, datay
+
+
+def _assert_stats_equal(result, expected):
+    assert len(result) == len(expected)
+    for r, e in zip(result, expected):
+        np.testing.assert_allclose(r, e, rtol=1e-10, atol=1e-12)
+
+
+@pytest.mark.parametrize("n_blocks", [1, 2, 7, 600])
+def test_running_group_stat(n_blocks):
+    datax, datay = _random_data()
+    stat = RunningGroupStat()
+    for block in np.array_split(np.arange(len(datax)), n_blocks):
+        stat.update(datax[block], datay[block])
+    with np.errstate(divide="ignore", invalid="ignore"):
+        expected = group_stat(datax, datay, STATS)
+        _assert_stats_equal(stat.result(STATS), expected)
+
+
+def test_running_group_stat_1d_and_state():
+    datax, datay = _random_data()
+    stat = RunningGroupStat()
+    stat.update(datax[:100], datay[:100, 0])
+    stat = RunningGroupStat.from_state(stat.state())
+    stat.update(datax[100:], datay[100:, 0])
+    _assert_stats_equal(stat.result(), group_stat(datax, datay[:, 0]))
+
+
+def _write_rows(f, datax, datay):
+    for x_i, y_i in zip(datax, datay):
+        f.write("{!r},{!r}\n".format(float(x_i), float(y_i)))
+
+
+@pytest.mark.parametrize("cache", [False, True])
+def test_csv_stat_loader(tmp_path, cache):
+    fileName = str(tmp_path / "data.csv")
+    datax, datay = _random_data()
+    datay = datay[:, 0]
+    csv_append_line(fileName, ["x", "y"])
+    loader = CsvStatLoader(fileName, "x", "y", cache=cache, block_bytes=256)
+    for start, stop in [(0, 0), (0, 1), (1, 250), (250, 600)]:
+        with open(fileName, "a") as f:
+            _write_rows(f, datax[start:stop], datay[start:stop])
+        if cache:
+            loader = CsvStatLoader(fileName, "x", "y", cache=True, block_bytes=256)
+        result = loader.refresh()
+        if stop > 0:
+            _assert_stats_equal(result, load_csv_data_with_stat(fileName, "x", "y"))
+
+
+def test_csv_stat_loader_torn_line(tmp_path):
+    fileName = str(tmp_path / "data.csv")
+    datax, datay = _random_data(100)
+    datay = datay[:, 0]
+    csv_append_line(fileName, ["x", "y"])
+    with open(fileName, "a") as f:
+        _write_rows(f, datax[:50], datay[:50])
+        f.write("{!r},{!r}".format(float(datax[50]), float(datay[50]))[:-3])
+    loader = CsvStatLoader(fileName, "x", "y")
+    # the torn line is not counted yet
+    _assert_stats_equal(loader.refresh(), group_stat(datax[:50], datay[:50]))
+    with open(fileName, "a") as f:
+        f.write("{!r}\n".format(float(datay[50]))[-4:])
+        _write_rows(f, datax[51:], datay[51:])
+    _assert_stats_equal(loader.refresh(), load_csv_data_with_stat(fileName, "x", "y"))
+    _assert_stats_equal(loader.refresh(), group_stat(datax, datay))